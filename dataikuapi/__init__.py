@@ -5,4 +5,6 @@ from apinode_admin_client import APINodeAdminClient
 
 from dss.recipe import GroupingRecipeCreator, JoinRecipeCreator, StackRecipeCreator, WindowRecipeCreator, SyncRecipeCreator, SamplingRecipeCreator, SQLQueryRecipeCreator, CodeRecipeCreator, SplitRecipeCreator, SortRecipeCreator, TopNRecipeCreator, DistinctRecipeCreator
 
-from dss.admin import DSSUserImpersonationRule, DSSGroupImpersonationRule
\ No newline at end of file
+from dss.admin import DSSUserImpersonationRule, DSSGroupImpersonationRule
+from transport import new_session, RetryPolicy, get_json_codec
+from polling import PollingScheduler, PendingResult
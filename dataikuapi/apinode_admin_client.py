@@ -6,11 +6,15 @@ from .base_client import DSSBaseClient
 class APINodeAdminClient(DSSBaseClient):
     """Entry point for the DSS APINode admin client"""
 
-    def __init__(self, uri, api_key):
+    def __init__(self, uri, api_key, session=None, retry_policy=None, json_codec=None):
         """
         Instantiate a new DSS API client on the given base uri with the given API key.
+
+        A session created by :func:`dataikuapi.transport.new_session` can be passed to share pooled connections with other clients.
+        Calls failing with transient errors are retried according to retry_policy, a :class:`dataikuapi.transport.RetryPolicy`.
+        JSON is encoded and decoded with json_codec, a :class:`dataikuapi.transport.JSONCodec`, by default the fastest installed JSON library.
         """
-        DSSBaseClient.__init__(self, "%s/%s" % (uri, "admin/api"), api_key)
+        DSSBaseClient.__init__(self, "%s/%s" % (uri, "admin/api"), api_key, session=session, retry_policy=retry_policy, json_codec=json_codec)
 
     ########################################################
     # Services generations
@@ -6,15 +6,18 @@ class APINodeClient(DSSBaseClient):
     This is an API client for the user-facing API of DSS API Node server (user facing API)
     """
 
-    def __init__(self, uri, service_id, api_key=None):
+    def __init__(self, uri, service_id, api_key=None, session=None, retry_policy=None, json_codec=None):
         """
         Instantiate a new DSS API client on the given base URI with the given API key.
 
         :param str uri: Base URI of the DSS API node server (http://host:port/ or https://host:port/)
         :param str service_id: Identifier of the service to query
         :param str api_key: Optional, API key for the service. Only required if the service has authentication
+        :param session: Optional, a session created by :func:`dataikuapi.transport.new_session`, to share pooled connections with other clients
+        :param retry_policy: Optional, a :class:`dataikuapi.transport.RetryPolicy` to retry calls failing with transient errors
+        :param json_codec: Optional, the :class:`dataikuapi.transport.JSONCodec` to use. Defaults to the fastest installed JSON library
         """
-        DSSBaseClient.__init__(self, "%s/%s" % (uri, "public/api/v1/%s" % service_id), api_key)
+        DSSBaseClient.__init__(self, "%s/%s" % (uri, "public/api/v1/%s" % service_id), api_key, session=session, retry_policy=retry_policy, json_codec=json_codec)
 
     def predict_record(self, endpoint_id, features, forced_generation=None, dispatch_key=None, context=None):
         """
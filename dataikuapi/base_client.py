@@ -1,35 +1,40 @@
-import json
-from requests import Session, exceptions
-from requests import exceptions
 from requests.auth import HTTPBasicAuth
-from .utils import DataikuException
+from .transport import new_session, send_with_retries, check_response, compress_body, get_json_codec
 
 class DSSBaseClient(object):
-    def __init__(self, base_uri, api_key=None, internal_ticket=None):
+    def __init__(self, base_uri, api_key=None, internal_ticket=None, session=None,
+                 pool_connections=10, pool_maxsize=10, pool_block=False, keep_alive=True,
+                 retry_policy=None, accept_encoding="gzip, deflate", compress_requests=False, json_codec=None):
         self.api_key = api_key
         self.base_uri = base_uri
-        self._session = Session()
+        if session is None:
+            session = new_session(pool_connections, pool_maxsize, pool_block, keep_alive)
+        self._session = session
+        self._retry_policy = retry_policy
+        self._headers = {"Accept-Encoding" : accept_encoding or "identity"}
+        self._compress_requests = compress_requests
+        self._json_codec = json_codec or get_json_codec()
 
     ########################################################
     # Internal Request handling
     ########################################################
 
     def _perform_http(self, method, path, params=None, body=None, stream=False):
+        headers = self._headers
         if body:
-            body = json.dumps(body)
+            body = self._json_codec.dumps(body)
+            if self._compress_requests:
+                (body, headers) = compress_body(body, headers)
 
         auth = HTTPBasicAuth(self.api_key, "")
 
-        try:
-            http_res = self._session.request(
+        def send():
+            return self._session.request(
                     method, "%s/%s" % (self.base_uri, path),
                     params=params, data=body,
-                    auth=auth, stream = stream)
-            http_res.raise_for_status()
-            return http_res
-        except exceptions.HTTPError:
-            ex = http_res.json()
-            raise DataikuException("%s: %s" % (ex.get("errorType", "Unknown error"), ex.get("message", "No message")))
+                    auth=auth, headers=headers, stream = stream)
+
+        return check_response(send_with_retries(self._retry_policy, method, send))
 
     def _perform_empty(self, method, path, params=None, body=None):
         self._perform_http(method, path, params, body, False)
@@ -38,7 +43,7 @@ class DSSBaseClient(object):
         return self._perform_http(method, path, params, body, False).text
 
     def _perform_json(self, method, path, params=None, body=None):
-        return self._perform_http(method, path, params, body, False).json()
+        return self._json_codec.loads(self._perform_http(method, path, params, body, False).content)
 
     def _perform_raw(self, method, path, params=None, body=None):
         return self._perform_http(method, path, params, body, True)
@@ -0,0 +1,196 @@
+import sys, threading
+from Queue import Queue, Empty, Full
+
+class BulkCallResult(object):
+    """
+    The outcome of one call run concurrently by :func:`map_concurrent` or a :class:`DSSBulkExecutor`
+    """
+    def __init__(self, item, value=None, exc_info=None):
+        self.item = item
+        self.value = value
+        self.exc_info = exc_info
+
+    def is_success(self):
+        """
+        Whether the call completed without raising
+        """
+        return self.exc_info is None
+
+    def get_error(self):
+        """
+        Get the exception raised by the call, or None if it succeeded
+        """
+        return None if self.exc_info is None else self.exc_info[1]
+
+    def get(self):
+        """
+        Get the value returned by the call, or re-raise the exception it raised
+        """
+        if self.exc_info is not None:
+            raise self.exc_info[0], self.exc_info[1], self.exc_info[2]
+        return self.value
+
+    def __repr__(self):
+        if self.exc_info is None:
+            return "BulkCallResult(%r, value=%r)" % (self.item, self.value)
+        return "BulkCallResult(%r, error=%r)" % (self.item, self.exc_info[1])
+
+
+def _check_max_workers(max_workers):
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1, got %s" % max_workers)
+
+def map_concurrent(func, items, max_workers=8):
+    """
+    Call func on each item using a bounded pool of threads.
+
+    Exceptions raised by the calls are captured instead of interrupting the other calls.
+
+    :param func: a function taking a single argument
+    :param items: the arguments to call func on
+    :param int max_workers: maximum number of calls running at the same time
+
+    :return: a list of :class:`BulkCallResult`, in the same order as items
+    """
+    _check_max_workers(max_workers)
+    items = list(items)
+    results = [None] * len(items)
+    pending = Queue()
+    for index, item in enumerate(items):
+        pending.put((index, item))
+
+    def work():
+        while True:
+            try:
+                index, item = pending.get_nowait()
+            except Empty:
+                return
+            try:
+                results[index] = BulkCallResult(item, value=func(item))
+            except Exception:
+                results[index] = BulkCallResult(item, exc_info=sys.exc_info())
+
+    workers = [threading.Thread(target=work) for i in range(min(max_workers, len(items)))]
+    for worker in workers:
+        worker.daemon = True
+        worker.start()
+    for worker in workers:
+        # Join with a timeout so that the main thread stays interruptible
+        while worker.is_alive():
+            worker.join(0.1)
+    return results
+
+
+class DSSBulkExecutor(object):
+    """
+    Collects calls on DSS handles, then runs them concurrently over the client's session.
+
+    Do not create this class directly, use :meth:`dataikuapi.dssclient.DSSClient.bulk`
+    """
+    def __init__(self, max_workers=8):
+        _check_max_workers(max_workers)
+        self.max_workers = max_workers
+        self.calls = []
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Add a call to run. Nothing is run until :meth:`execute` is called
+
+        :return: the index of the call's result in the list returned by :meth:`execute`
+        """
+        self.calls.append((func, args, kwargs))
+        return len(self.calls) - 1
+
+    def execute(self):
+        """
+        Run all the submitted calls, and forget them
+
+        :return: a list of :class:`BulkCallResult`, in the order the calls were submitted. The item of
+            each result is the (func, args, kwargs) tuple of the call
+        """
+        calls = self.calls
+        self.calls = []
+        return map_concurrent(lambda call: call[0](*call[1], **call[2]), calls, self.max_workers)
+
+
+_END = object()
+
+def iter_concurrent(keys, iterate, max_workers=4, preserve_order=False, queue_size=4):
+    """
+    Consume the iterators iterate(key) for each key in a bounded pool of threads, and yield their items
+    as (key, item) tuples.
+
+    At most queue_size items of each iterator are read ahead of the consumer. If the consumer stops
+    early, the workers stop and close their iterators.
+
+    :param keys: the keys to call iterate on
+    :param iterate: a function returning an iterator for a key
+    :param int max_workers: maximum number of iterators consumed at the same time
+    :param bool preserve_order: if True, all the items of a key are yielded before the items of the next
+        key. Otherwise, items are yielded as soon as they are available
+    """
+    # Checked before the first item is requested
+    _check_max_workers(max_workers)
+    return _iter_concurrent(list(keys), iterate, max_workers, preserve_order, queue_size)
+
+def _iter_concurrent(keys, iterate, max_workers, preserve_order, queue_size):
+    if preserve_order:
+        queues = [Queue(queue_size) for key in keys]
+    else:
+        queues = [Queue(queue_size * max_workers)] * len(keys)
+    pending = Queue()
+    for index in range(len(keys)):
+        pending.put(index)
+    stopped = threading.Event()
+
+    def put(queue, item):
+        while not stopped.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+
+    def work():
+        while not stopped.is_set():
+            try:
+                index = pending.get_nowait()
+            except Empty:
+                return
+            iterator = None
+            try:
+                iterator = iter(iterate(keys[index]))
+                for item in iterator:
+                    if not put(queues[index], (index, item, None)):
+                        break
+                else:
+                    put(queues[index], (index, _END, None))
+            except Exception:
+                put(queues[index], (index, _END, sys.exc_info()))
+            finally:
+                if hasattr(iterator, "close"):
+                    iterator.close()
+
+    workers = [threading.Thread(target=work) for i in range(min(max_workers, len(keys)))]
+    for worker in workers:
+        worker.daemon = True
+        worker.start()
+    try:
+        remaining = len(keys)
+        current = 0
+        while remaining > 0:
+            queue = queues[current] if preserve_order else queues[0]
+            try:
+                (index, item, exc_info) = queue.get(timeout=0.1)
+            except Empty:
+                continue
+            if item is _END:
+                if exc_info is not None:
+                    raise exc_info[0], exc_info[1], exc_info[2]
+                remaining -= 1
+                current += 1
+            else:
+                yield (keys[index], item)
+    finally:
+        stopped.set()
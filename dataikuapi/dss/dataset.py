@@ -1,7 +1,12 @@
 from ..utils import DataikuException
 from ..utils import DataikuUTF8CSVReader
-from ..utils import DataikuStreamedHttpUTF8CSVReader
+from ..utils import DataikuStreamedHttpUTF8CSVReader, get_column_indices
+from ..bulk import iter_concurrent
+from .datasetcache import DSSDatasetLocalCache
+from .datasetwriter import DSSDatasetWriter
 import json
+import os.path as osp
+from itertools import islice
 from .metrics import ComputedMetrics
 
 class DSSDataset(object):
@@ -23,10 +28,13 @@ class DSSDataset(object):
 
         :param drop_data: Should the data of the dataset be dropped
         """
-        return self.client._perform_empty(
-            "DELETE", "/projects/%s/datasets/%s" % (self.project_key, self.dataset_name), params = {
-                "dropData" : drop_data
-            })
+        try:
+            return self.client._perform_empty(
+                "DELETE", "/projects/%s/datasets/%s" % (self.project_key, self.dataset_name), params = {
+                    "dropData" : drop_data
+                })
+        finally:
+            self._invalidate_cached_schema()
 
 
     ########################################################
@@ -51,9 +59,12 @@ class DSSDataset(object):
             definition: the definition, as a JSON object. You should only set a definition object 
             that has been retrieved using the get_definition call.
         """
-        return self.client._perform_json(
-                "PUT", "/projects/%s/datasets/%s" % (self.project_key, self.dataset_name),
-                body=definition)
+        try:
+            return self.client._perform_json(
+                    "PUT", "/projects/%s/datasets/%s" % (self.project_key, self.dataset_name),
+                    body=definition)
+        finally:
+            self._invalidate_cached_schema()
 
     ########################################################
     # Dataset metadata
@@ -61,13 +72,15 @@ class DSSDataset(object):
 
     def get_schema(self):
         """
-        Get the schema of the dataset
+        Get the schema of the dataset. This also refreshes the schema cached by the client, if any
         
         Returns:
             a JSON object of the schema, with the list of columns
         """
-        return self.client._perform_json(
+        schema = self.client._perform_json(
                 "GET", "/projects/%s/datasets/%s/schema" % (self.project_key, self.dataset_name))
+        self.client._schema_cache.put((self.project_key, self.dataset_name), schema["columns"])
+        return schema
 
     def set_schema(self, schema):
         """
@@ -77,9 +90,12 @@ class DSSDataset(object):
             schema: the desired schema for the dataset, as a JSON object. All columns have to provide their
             name and type
         """
-        return self.client._perform_json(
-                "PUT", "/projects/%s/datasets/%s/schema" % (self.project_key, self.dataset_name),
-                body=schema)
+        try:
+            return self.client._perform_json(
+                    "PUT", "/projects/%s/datasets/%s/schema" % (self.project_key, self.dataset_name),
+                    body=schema)
+        finally:
+            self._invalidate_cached_schema()
 
     def get_metadata(self):
         """
@@ -110,22 +126,197 @@ class DSSDataset(object):
     # Dataset data
     ########################################################
 
-    def iter_rows(self, partitions=None):
+    def iter_rows(self, partitions=None, columns=None, limit=None, sampling=None, prefetch=False, row_type="list"):
         """
         Get the dataset's data
-        
+
+        Args:
+            partitions: (optional) the partitions to read
+            columns: (optional) the names of the columns to read. Other columns are not downloaded
+            limit: (optional) the maximum number of rows to read. The stream is closed once they are read
+            sampling: (optional) a DSS sampling definition, as a JSON object. For example
+                {"samplingMethod" : "RANDOM_FIXED_RATIO", "ratio" : 0.1}
+            prefetch: if True, the data is read from the network by a background thread while rows
+                are decoded
+            row_type: the type of the rows: "list", "tuple", "record" (objects with an attribute per
+                column, generated for the schema) or "buffer" (a single list overwritten by each row, that
+                must be copied to be kept). See :func:`dataikuapi.utils.make_row_decoder`
+
         Return:
             an iterator over the rows, each row being a tuple of values. The order of values
-            in the tuples is the same as the order of columns in the schema returned by get_schema
+            in the tuples is the same as the order of columns in the schema returned by get_schema,
+            or the order of columns if it is given
+        """
+        return self._get_data_reader(partitions, columns, limit, sampling, prefetch=prefetch).iter_rows(row_type)
+
+    def iter_batches(self, batch_size=10000, partitions=None, columns=None, limit=None, sampling=None, prefetch=False):
+        """
+        Get the dataset's data by batches of columns. Requires numpy and pandas.
+
+        Args:
+            batch_size: the maximum number of rows in each batch
+            partitions, columns, limit, sampling, prefetch: (optional) see :meth:`iter_rows`
+
+        Return:
+            an iterator over the batches, each batch being an ordered dict of column name to numpy array,
+            with the same types in all batches. Integer and boolean columns are masked arrays of int64 and
+            bool, floating point columns are float64, date columns are datetime64 and other columns are
+            objects. See :meth:`dataikuapi.utils.DataikuStreamedHttpUTF8CSVReader.iter_batches`
+        """
+        return self._get_data_reader(partitions, columns, limit, sampling, prefetch=prefetch).iter_batches(batch_size)
+
+    def to_dataframe(self, partitions=None, columns=None, limit=None, sampling=None):
+        """
+        Get the dataset's data as a pandas DataFrame. Requires numpy and pandas.
+
+        Args:
+            partitions, columns, limit, sampling: (optional) see :meth:`iter_rows`
+
+        Return:
+            a pandas DataFrame, see :meth:`dataikuapi.utils.DataikuStreamedHttpUTF8CSVReader.to_dataframe` for the column types
+        """
+        return self._get_data_reader(partitions, columns, limit, sampling).to_dataframe()
+
+    def iter_arrow_batches(self, batch_size=10000, partitions=None, columns=None, limit=None, sampling=None):
+        """
+        Get the dataset's data as Arrow record batches. Requires pyarrow, numpy and pandas.
+
+        The Arrow schema is built from the dataset schema before reading the data, so all batches share it.
+
+        Args:
+            batch_size: the maximum number of rows in each batch
+            partitions, columns, limit, sampling: (optional) see :meth:`iter_rows`
+
+        Return:
+            an iterator over pyarrow.RecordBatch objects
+        """
+        return self._get_data_reader(partitions, columns, limit, sampling).iter_arrow_batches(batch_size)
+
+    def export_to_parquet(self, path, partitions=None, batch_size=10000, compression="snappy", columns=None, limit=None, sampling=None):
+        """
+        Write the dataset's data to a local Parquet file. Requires pyarrow, numpy and pandas.
+
+        Data is streamed, so that at most batch_size rows are held in memory, each batch being a row group
+
+        Args:
+            path: the path of the file to write
+            partitions, columns, limit, sampling: (optional) see :meth:`iter_rows`
+            compression: the Parquet compression codec
+        """
+        self._get_data_reader(partitions, columns, limit, sampling).write_parquet(path, batch_size, compression)
+
+    def export_to_arrow_ipc(self, path, partitions=None, batch_size=10000, columns=None, limit=None, sampling=None):
+        """
+        Write the dataset's data to a local Arrow IPC file. Requires pyarrow, numpy and pandas.
+        See :meth:`dataikuapi.utils.DataikuStreamedHttpUTF8CSVReader.write_arrow_ipc`
+
+        Data is streamed, so that at most batch_size rows are held in memory
+
+        Args:
+            path: the path of the file to write
+            partitions, columns, limit, sampling: (optional) see :meth:`iter_rows`
         """
+        self._get_data_reader(partitions, columns, limit, sampling).write_arrow_ipc(path, batch_size)
+
+    def iter_partition_batches(self, partitions=None, max_workers=4, batch_size=10000, preserve_order=False, columns=None):
+        """
+        Read several partitions of the dataset concurrently, each partition being streamed and decoded
+        in its own thread.
+
+        Args:
+            partitions: (optional) the list of partition identifiers to read. Defaults to all the
+                partitions, as returned by list_partitions
+            max_workers: the maximum number of partitions read at the same time
+            batch_size: the maximum number of rows in each batch
+            preserve_order: if True, the batches of a partition are all yielded before the batches of
+                the next one. Otherwise, batches are yielded as soon as they are decoded
+            columns: (optional) the names of the columns to read
+
+        Return:
+            an iterator over (partition identifier, list of rows) tuples
+        """
+        if partitions is None:
+            partitions = self.list_partitions()
+        schema = self._get_schema_columns()
+
+        def read_partition(partition):
+            rows = self._get_data_reader(partition, columns, schema=schema).iter_rows()
+            try:
+                while True:
+                    batch = list(islice(rows, batch_size))
+                    if len(batch) == 0:
+                        return
+                    yield batch
+            finally:
+                rows.close()
+
+        return iter_concurrent(partitions, read_partition, max_workers, preserve_order)
+
+    def get_local_cache(self, cache_dir=None, max_age=None):
+        """
+        Get a local copy of the dataset's data, which can be read many times without downloading it again.
+        Call refresh() on the returned cache to fetch the partitions that changed since the last refresh.
+
+        Args:
+            cache_dir: (optional) the local directory to store the data in. Defaults to ~/.cache/dataiku-api-client
+            max_age: (optional) the number of seconds after which cached partitions are fetched again by refresh()
+
+        Returns:
+            A :class:`dataikuapi.dss.datasetcache.DSSDatasetLocalCache`
+        """
+        if cache_dir is None:
+            cache_dir = osp.join(osp.expanduser("~"), ".cache", "dataiku-api-client")
+        return DSSDatasetLocalCache(self, cache_dir, max_age)
+
+    def get_writer(self, partition=None, chunk_rows=100000):
+        """
+        Get a writer to stream rows or pandas DataFrames to this dataset, validated against its schema.
+        The dataset must be a "Files in folder" dataset in CSV format: data is uploaded to its managed
+        folder as gzip-compressed files of at most chunk_rows rows.
+
+        Args:
+            partition: the partition to write to, required if the dataset is partitioned
+            chunk_rows: the maximum number of rows held in memory and uploaded in each file
+
+        Returns:
+            A :class:`dataikuapi.dss.datasetwriter.DSSDatasetWriter`, to close after writing
+        """
+        return DSSDatasetWriter(self, partition, chunk_rows)
+
+    def _get_data_reader(self, partitions=None, columns=None, limit=None, sampling=None, schema=None, prefetch=False):
+        if schema is None:
+            schema = self._get_schema_columns()
+        if limit is not None:
+            sampling = dict(sampling or {"samplingMethod" : "HEAD_SEQUENTIAL"}, maxRecords=limit)
+        column_list = None
+        if columns is not None:
+            # Checked before opening the stream. The columns are requested in the schema's order, so
+            # that the stream has the same layout whatever order DSS sends them in. Names containing a
+            # comma cannot be passed in the list, all columns are downloaded then
+            selected = [schema[i] for i in sorted(set(get_column_indices(schema, columns)))]
+            if not any("," in col["name"] for col in selected):
+                schema = selected
+                column_list = ",".join(col["name"] for col in selected)
         csv_stream = self.client._perform_raw(
                 "GET" , "/projects/%s/datasets/%s/data/" %(self.project_key, self.dataset_name),
                 params = {
                     "format" : "tsv-excel-noheader",
-                    "partitions" : partitions
+                    "partitions" : partitions,
+                    "columns" : column_list,
+                    "sampling" : json.dumps(sampling) if sampling is not None else None
                 })
 
-        return DataikuStreamedHttpUTF8CSVReader(self.get_schema()["columns"], csv_stream).iter_rows()
+        return DataikuStreamedHttpUTF8CSVReader(schema, csv_stream, columns, limit, prefetch)
+
+    def _get_schema_columns(self):
+        columns = self.client._schema_cache.get((self.project_key, self.dataset_name))
+        if columns is None:
+            columns = self.get_schema()["columns"]
+        return columns
+
+    def _invalidate_cached_schema(self):
+        # Called after the changes, so that a concurrent read during a change does not keep the old schema cached
+        self.client._schema_cache.invalidate((self.project_key, self.dataset_name))
 
 
     def list_partitions(self):
@@ -222,6 +413,19 @@ class DSSDataset(object):
                 "GET", "/projects/%s/datasets/%s/metrics/history/%s" % (self.project_key, self.dataset_name, 'NP' if len(partition) == 0 else partition),
                 params={'metricLookup' : metric if isinstance(metric, str) or isinstance(metric, unicode) else json.dumps(metric)})
 
+    def iter_metric_history(self, metric, partition=''):
+        """
+        Iterate over the history of the values of the metric on this dataset, parsing the values one at
+        a time from the response instead of loading the whole history in memory
+
+        Returns:
+            an iterator over the values of the metric, see :meth:`get_metric_history`
+        """
+        return self.client._perform_json_items(
+                "GET", "/projects/%s/datasets/%s/metrics/history/%s" % (self.project_key, self.dataset_name, 'NP' if len(partition) == 0 else partition),
+                params={'metricLookup' : metric if isinstance(metric, str) or isinstance(metric, unicode) else json.dumps(metric)},
+                key="values")
+
     ########################################################
     # Usages
     ########################################################
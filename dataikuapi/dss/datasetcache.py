@@ -0,0 +1,210 @@
+from ..utils import DataikuStreamedHttpUTF8CSVReader, get_column_indices
+from ..bulk import map_concurrent
+import json, mmap, os, shutil, time, urllib
+import os.path as osp
+
+class DSSDatasetLocalCache(object):
+    """
+    A copy of the data of a dataset in a local directory, refreshed partition by partition.
+
+    Each partition is stored as the TSV data sent by DSS, and read back through a memory mapping with the
+    same decoding as :meth:`dataikuapi.dss.dataset.DSSDataset.iter_rows`.
+
+    The cache is revalidated by :meth:`refresh`: if the schema or the version of the dataset definition
+    changed, everything is fetched again. Otherwise, only new partitions, and partitions older than
+    max_age seconds, are fetched, and removed partitions are dropped. DSS does not expose when the data
+    of a partition was last built, so max_age (or refresh(force=True)) is needed to pick up rebuilds of
+    partitions that are already cached.
+
+    Do not create this class directly, use :meth:`dataikuapi.dss.dataset.DSSDataset.get_local_cache`
+    """
+    def __init__(self, dataset, cache_dir, max_age=None):
+        self.dataset = dataset
+        self.max_age = max_age
+        self.path = osp.join(cache_dir, dataset.project_key, dataset.dataset_name)
+        self.manifest = self._load_manifest()
+
+    ########################################################
+    # Revalidation
+    ########################################################
+
+    def refresh(self, force=False, max_workers=4):
+        """
+        Revalidate the cache against DSS, and fetch the partitions that are missing or outdated
+
+        Args:
+            force: if True, fetch all the partitions again
+            max_workers: the maximum number of partitions fetched at the same time
+
+        Returns:
+            the list of the partitions that were fetched
+        """
+        definition = self.dataset.get_definition()
+        schema = self.dataset.get_schema()["columns"]
+        version = definition.get("versionTag", {}).get("versionNumber")
+        if len(definition.get("partitioning", {}).get("dimensions", [])) > 0:
+            partitions = self.dataset.list_partitions()
+        else:
+            partitions = ["NP"]
+
+        manifest = self.manifest
+        if force or manifest is None or manifest["schema"] != schema or manifest["version"] != version:
+            manifest = {"schema" : schema, "version" : version, "partitions" : {}}
+        cached = manifest["partitions"]
+
+        for partition in list(cached.keys()):
+            if partition not in partitions:
+                del cached[partition]
+        now = time.time()
+        outdated = [partition for partition in partitions
+                    if partition not in cached
+                    or (self.max_age is not None and now - cached[partition]["fetchedOn"] > self.max_age)]
+
+        if not osp.isdir(self.path):
+            os.makedirs(self.path)
+        failed = []
+        for result in map_concurrent(self._fetch, outdated, max_workers):
+            if result.is_success():
+                cached[result.item] = result.value
+            else:
+                failed.append(result)
+        self._save_manifest(manifest)
+        self._remove_unused_files()
+        if len(failed) > 0:
+            failed[0].get()
+        return outdated
+
+    def clear(self):
+        """
+        Remove all the cached data of the dataset
+        """
+        if osp.isdir(self.path):
+            shutil.rmtree(self.path)
+        self.manifest = None
+
+    def list_partitions(self):
+        """
+        Get the list of the cached partitions ("NP" for a non-partitioned dataset)
+        """
+        if self.manifest is None:
+            return []
+        return sorted(self.manifest["partitions"].keys())
+
+    ########################################################
+    # Data
+    ########################################################
+
+    def iter_rows(self, partitions=None, columns=None, row_type="list"):
+        """
+        Get the cached data. The cache is refreshed first if it is empty
+
+        Args:
+            partitions: (optional) the list of cached partitions to read. Defaults to all of them
+            columns, row_type: (optional) see :meth:`dataikuapi.dss.dataset.DSSDataset.iter_rows`
+
+        Return:
+            an iterator over the rows
+        """
+        for reader in self._get_data_readers(partitions, columns):
+            for row in reader.iter_rows(row_type):
+                yield row
+
+    def to_dataframe(self, partitions=None, columns=None):
+        """
+        Get the cached data as a pandas DataFrame. Requires numpy and pandas. The cache is refreshed first if it is empty
+
+        Args:
+            partitions, columns: (optional) see :meth:`iter_rows`
+        """
+        import pandas as pd
+
+        frames = [reader.to_dataframe() for reader in self._get_data_readers(partitions, columns)]
+        return pd.concat(frames, ignore_index=True)
+
+    def _get_data_readers(self, partitions, columns):
+        if self.manifest is None:
+            self.refresh()
+        cached = self.manifest["partitions"]
+        if partitions is None:
+            partitions = sorted(cached.keys())
+        missing = [partition for partition in partitions if partition not in cached]
+        if len(missing) > 0:
+            raise ValueError("Partitions not in the cache: %s" % ", ".join(missing))
+        schema = self.manifest["schema"]
+        if columns is not None:
+            get_column_indices(schema, columns)
+        # Files are opened one at a time, when their partition is reached
+        return (DataikuStreamedHttpUTF8CSVReader(schema, _MappedFile(osp.join(self.path, cached[partition]["file"])), columns)
+                for partition in partitions)
+
+    ########################################################
+    # Storage
+    ########################################################
+
+    def _fetch(self, partition):
+        file_name = "%s.tsv" % urllib.quote(partition.encode("utf8"), safe="")
+        tmp_path = osp.join(self.path, file_name + ".tmp")
+        stream = self.dataset.client._perform_raw(
+                "GET" , "/projects/%s/datasets/%s/data/" % (self.dataset.project_key, self.dataset.dataset_name),
+                params = {
+                    "format" : "tsv-excel-noheader",
+                    "partitions" : partition if partition != "NP" else None
+                })
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in stream.iter_content(chunk_size=65536):
+                    if chunk:
+                        f.write(chunk)
+        finally:
+            stream.close()
+        _replace(tmp_path, osp.join(self.path, file_name))
+        return {"file" : file_name, "fetchedOn" : time.time()}
+
+    def _load_manifest(self):
+        manifest_path = osp.join(self.path, "manifest.json")
+        if not osp.isfile(manifest_path):
+            return None
+        with open(manifest_path) as f:
+            return json.load(f)
+
+    def _save_manifest(self, manifest):
+        tmp_path = osp.join(self.path, "manifest.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        _replace(tmp_path, osp.join(self.path, "manifest.json"))
+        self.manifest = manifest
+
+    def _remove_unused_files(self):
+        used = set(entry["file"] for entry in self.manifest["partitions"].values())
+        used.add("manifest.json")
+        for file_name in os.listdir(self.path):
+            if file_name not in used:
+                os.remove(osp.join(self.path, file_name))
+
+
+def _replace(src, dst):
+    """
+    Rename src to dst, replacing dst. On Windows, os.rename fails when dst exists, so it is removed first
+    """
+    if os.name == "nt" and osp.exists(dst):
+        os.remove(dst)
+    os.rename(src, dst)
+
+
+class _MappedFile(object):
+    """
+    A memory-mapped local file, exposing its lines like a streamed HTTP response
+    """
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        if osp.getsize(path) > 0:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.raw = iter(self._map.readline, "")
+        else:
+            self._map = None
+            self.raw = iter([])
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
@@ -0,0 +1,228 @@
+from ..utils import DataikuException, INT_TYPES, FLOAT_TYPES
+from .managedfolder import DSSManagedFolder
+from datetime import datetime, date
+import csv, gzip, io, numbers, time
+
+class DSSDatasetWriter(object):
+    """
+    Streams rows to a dataset stored in a managed folder (a "Files in folder" dataset), as compressed
+    CSV files uploaded by chunks, so that memory use stays bounded whatever the number of rows written.
+
+    Rows are validated against the schema of the dataset. The dataset must use the CSV format; its
+    separator, quote character and header settings are used to write the files, which are gzip-compressed.
+    For a partitioned dataset, files are written under one directory per partition dimension value, in
+    the order of the dimensions, so the dataset's file path pattern must follow that layout
+    (for example /%{country}/%{day}/.*).
+
+    The writer must be closed to upload the last chunk; it can be used as a context manager. If an
+    exception is raised in the context, the pending chunk is discarded, but chunks already uploaded stay
+    in the folder.
+
+    Do not create this class directly, use :meth:`dataikuapi.dss.dataset.DSSDataset.get_writer`
+    """
+    def __init__(self, dataset, partition=None, chunk_rows=100000, chunk_bytes=64 * 1024 * 1024):
+        self.dataset = dataset
+        self.partition = partition
+        self.chunk_rows = chunk_rows
+        self.chunk_bytes = chunk_bytes
+
+        definition = dataset.get_definition()
+        folder_id = definition.get("params", {}).get("folderSmartId")
+        if definition.get("type") != "FilesInFolder" or folder_id is None:
+            raise DataikuException("Dataset %s is not stored in a managed folder, it can not be written to" % dataset.dataset_name)
+        if definition.get("formatType") != "csv":
+            raise DataikuException("Dataset %s must use the csv format to be written to" % dataset.dataset_name)
+        if "." in folder_id:
+            (folder_project_key, folder_id) = folder_id.split(".", 1)
+        else:
+            folder_project_key = dataset.project_key
+        self.folder = DSSManagedFolder(dataset.client, folder_project_key, folder_id)
+
+        dimensions = definition.get("partitioning", {}).get("dimensions", [])
+        if len(dimensions) > 0 and partition is None:
+            raise ValueError("Dataset %s is partitioned, a partition to write must be given" % dataset.dataset_name)
+        if len(dimensions) == 0 and partition is not None:
+            raise ValueError("Dataset %s is not partitioned" % dataset.dataset_name)
+        self.path_prefix = "" if partition is None else "/".join(partition.split("|")) + "/"
+
+        format_params = definition.get("formatParams", {})
+        self.dialect = {
+            "delimiter" : str(format_params.get("separator", "\t")),
+            "quotechar" : str(format_params.get("quoteChar", '"')),
+            "lineterminator" : "\n",
+            "doublequote" : True
+        }
+        self.write_header = format_params.get("parseHeaderRow", False)
+
+        self.schema = dataset.get_schema()["columns"]
+        self.formatters = [_get_formatter(col) for col in self.schema]
+
+        self.file_prefix = "part-%d" % int(time.time() * 1000)
+        self.chunk_count = 0
+        self.rows = 0
+        self.raw_bytes = 0
+        self.sent_bytes = 0
+        self.start_time = time.time()
+        self._new_chunk()
+
+    def _new_chunk(self):
+        self._buffer = io.BytesIO()
+        self._raw = _CountingWriter(self._buffer)
+        self._gzip = gzip.GzipFile(fileobj=self._raw, mode="wb")
+        self._counter = _CountingWriter(self._gzip)
+        self._csv = csv.writer(self._counter, **self.dialect)
+        self._chunk_rows = 0
+        if self.write_header:
+            self._csv.writerow([col["name"].encode("utf8") for col in self.schema])
+
+    def write_row(self, row):
+        """
+        Write a row, as a list or tuple of values in the order of the dataset's schema columns.
+        None values are written as empty values
+        """
+        if len(row) != len(self.formatters):
+            raise ValueError("Row has %d values, but the schema has %d columns" % (len(row), len(self.formatters)))
+        self._csv.writerow([formatter(value) for (formatter, value) in zip(self.formatters, row)])
+        self._chunk_rows += 1
+        self.rows += 1
+        if self._chunk_rows >= self.chunk_rows or self._raw.count >= self.chunk_bytes:
+            self._upload_chunk()
+
+    def write_rows(self, rows):
+        """
+        Write an iterable of rows, see :meth:`write_row`
+        """
+        for row in rows:
+            self.write_row(row)
+
+    def write_dataframe(self, df):
+        """
+        Write the rows of a pandas DataFrame, whose columns must be the same as the dataset's schema columns.
+        Missing values (NaN, NaT) are written as empty values
+        """
+        names = [col["name"] for col in self.schema]
+        if list(df.columns) != names:
+            raise ValueError("DataFrame columns %s do not match the schema columns %s" % (list(df.columns), names))
+        import pandas as pd
+        df = df.astype(object).where(pd.notnull(df), None)
+        for row in df.itertuples(index=False):
+            self.write_row(row)
+
+    def _upload_chunk(self):
+        if self._chunk_rows == 0:
+            return
+        self._gzip.close()
+        self.raw_bytes += self._counter.count
+        self.sent_bytes += self._raw.count
+        self._buffer.seek(0)
+        self.folder.put_file("%s%s-%05d.csv.gz" % (self.path_prefix, self.file_prefix, self.chunk_count), self._buffer)
+        self.chunk_count += 1
+        self._new_chunk()
+
+    def close(self):
+        """
+        Upload the last chunk of rows
+        """
+        self._upload_chunk()
+
+    def get_stats(self):
+        """
+        Get the throughput of the writer
+
+        Returns:
+            a dict with the number of rows written, the number of bytes of CSV written and of compressed
+            bytes uploaded, the elapsed time in seconds, and the rate of rows per second
+        """
+        elapsed = time.time() - self.start_time
+        return {
+            "rows" : self.rows,
+            "chunks" : self.chunk_count,
+            "rawBytes" : self.raw_bytes,
+            "sentBytes" : self.sent_bytes,
+            "seconds" : elapsed,
+            "rowsPerSecond" : self.rows / elapsed if elapsed > 0 else 0
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+
+
+class _CountingWriter(object):
+    def __init__(self, f):
+        self.f = f
+        self.count = 0
+
+    def write(self, data):
+        self.count += len(data)
+        self.f.write(data)
+
+    def flush(self):
+        self.f.flush()
+
+
+def _format_string(value):
+    if value is None:
+        return ""
+    if isinstance(value, unicode):
+        return value.encode("utf8")
+    return str(value)
+
+def _format_int(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool) or not isinstance(value, numbers.Integral):
+        raise ValueError("Expected an integer, got %r" % (value,))
+    return str(value)
+
+def _format_float(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool) or not isinstance(value, numbers.Real):
+        raise ValueError("Expected a number, got %r" % (value,))
+    return repr(float(value))
+
+def _is_numpy_bool(value):
+    # numpy.bool_ is not registered as an Integral. Checked without importing numpy, which is optional
+    return getattr(value, "shape", None) == () and getattr(getattr(value, "dtype", None), "kind", None) == "b"
+
+def _format_bool(value):
+    if value is None:
+        return ""
+    if not isinstance(value, (bool, numbers.Integral)) and not _is_numpy_bool(value):
+        raise ValueError("Expected a boolean, got %r" % (value,))
+    return "true" if value else "false"
+
+def _format_date(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = (value - value.utcoffset()).replace(tzinfo=None)
+        return value.strftime("%Y-%m-%dT%H:%M:%S.") + "%03dZ" % (value.microsecond // 1000)
+    if isinstance(value, date):
+        return value.strftime("%Y-%m-%dT00:00:00.000Z")
+    raise ValueError("Expected a date, got %r" % (value,))
+
+def _get_formatter(col):
+    col_type = col["type"]
+    if col_type in INT_TYPES:
+        formatter = _format_int
+    elif col_type in FLOAT_TYPES:
+        formatter = _format_float
+    elif col_type == "boolean":
+        formatter = _format_bool
+    elif col_type == "date":
+        formatter = _format_date
+    else:
+        return _format_string
+
+    def format_value(value):
+        try:
+            return formatter(value)
+        except ValueError as e:
+            raise ValueError("Invalid value for column %s: %s" % (col["name"], e))
+    return format_value
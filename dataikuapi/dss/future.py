@@ -1,3 +1,5 @@
+from ..utils import poll_until, polling_intervals, wait_for_next_poll
+from ..polling import DEFAULT_SCHEDULER
 import sys, time
 
 class DSSFuture(object):
@@ -53,17 +55,101 @@ class DSSFuture(object):
             self.get_state()
         return self.state.get('hasResult', False)
             
-    def wait_for_result(self):
+    def is_done(self):
+        """
+        Checks, from the last known state, whether the future has completed (with or without a result)
+        """
+        return self.state is not None and (self.state.get('hasResult', False) or not self.state.get('alive', True))
+
+    def wait_for_result(self, timeout=None, initial_interval=0.05, max_interval=5, backoff=1.5, progress_callback=None):
         """
         Wait and get the future result
+
+        The state of the future is peeked at, which is cheap, with waits starting at initial_interval
+        seconds and multiplied by backoff after each poll, up to max_interval seconds. The result is
+        fetched once the future is done.
+
+        Args:
+            timeout: (optional) maximum time to wait, in seconds. A DataikuException is raised when it elapses
+            progress_callback: (optional) a function called with the state of the future after each poll
         """
         if self.state is None or not self.state.get('hasResult', False) or self.state_is_peek:
-            self.get_state()
-        while not self.state.get('hasResult', False):
-            time.sleep(5)
+            def poll():
+                state = self.peek_state()
+                if progress_callback is not None:
+                    progress_callback(state)
+                return state
+            poll_until(poll, lambda state: self.is_done(), timeout, initial_interval, max_interval, backoff,
+                       "future %s" % self.job_id)
             self.get_state()
         if self.state.get('hasResult', False):
             return self.state.get('result', None)
         else:
             raise Exception("No result")
 
+    def result_async(self, timeout=None, initial_interval=0.05, max_interval=5, backoff=1.5, scheduler=None):
+        """
+        Wait for the result of the future in the background, without blocking the calling thread.
+
+        The future is polled like in :meth:`wait_for_result`, by a :class:`dataikuapi.polling.PollingScheduler`
+        shared by all the operations waited for in the background, so that many futures can be tracked
+        from a single thread.
+
+        Args:
+            timeout: (optional) maximum time to wait, in seconds
+            scheduler: (optional) the scheduler polling the future. Defaults to the shared scheduler
+
+        Returns:
+            a :class:`dataikuapi.polling.PendingResult`, whose result() is the result of the future
+        """
+        def poll():
+            self.peek_state()
+            if not self.is_done():
+                return (False, None)
+            self.get_state()
+            if not self.state.get('hasResult', False):
+                raise Exception("No result")
+            return (True, self.state.get('result', None))
+        return (scheduler or DEFAULT_SCHEDULER).submit(poll, "future %s" % self.job_id, timeout, initial_interval, max_interval, backoff)
+
+
+def iter_completed_futures(client, futures, timeout=None, initial_interval=0.05, max_interval=5, backoff=1.5, all_users=False):
+    """
+    Wait for many futures in a single polling loop, and yield them as they complete, with their final
+    state (and result) fetched.
+
+    Each poll lists the running futures in one call. Only the futures missing from that list have their
+    state peeked at individually.
+
+    Do not call this function directly, use :meth:`dataikuapi.dssclient.DSSClient.wait_futures`
+    """
+    deadline = None if timeout is None else time.time() + timeout
+    pending = []
+    for future in futures:
+        if future.state is not None and future.state.get('hasResult', False) and not future.state_is_peek:
+            yield future
+        else:
+            pending.append(future)
+
+    for interval in polling_intervals(initial_interval, max_interval, backoff):
+        if len(pending) == 0:
+            return
+        running = client._perform_json("GET", "/futures/", params={"withScenarios":True, "withNotScenarios":True, 'allUsers' : all_users})
+        running = dict((state['jobId'], state) for state in running)
+        still_pending = []
+        for future in pending:
+            state = running.get(future.job_id)
+            if state is not None:
+                future.state = state
+                future.state_is_peek = True
+            else:
+                future.peek_state()
+            if future.is_done():
+                future.get_state()
+                yield future
+            else:
+                still_pending.append(future)
+        pending = still_pending
+        if len(pending) == 0:
+            return
+        wait_for_next_poll(interval, deadline, timeout, "%d futures" % len(pending))
@@ -1,3 +1,6 @@
+from ..utils import DataikuException, polling_intervals
+import codecs, re, time
+
 
 class DSSJob(object):
     """
@@ -40,3 +43,64 @@ class DSSJob(object):
             params={
                 "activity" : activity
             })
+
+    def tail_log(self, activity=None, initial_interval=0.5, max_interval=10, backoff=1.5):
+        """
+        Follow the log of the job while it runs, until the job is done, failed or aborted
+
+        Only the part of the log written since the previous poll is downloaded, using HTTP range requests.
+        If the server does not honor them, the whole log is downloaded but only its new part is returned.
+        Polls are spaced from initial_interval to max_interval seconds, and tightened again when the log grows.
+
+        Args:
+            activity: (optional) the name of the activity in the job whose log is followed
+
+        Returns:
+            an iterator over the new parts of the log, as strings
+        """
+        decoder = codecs.getincrementaldecoder("utf8")(errors="replace")
+        offset = 0
+        intervals = polling_intervals(initial_interval, max_interval, backoff)
+        while True:
+            # Read the status first, so that the log read next is complete once the job is over
+            state = self.get_status().get("baseStatus", {}).get("state")
+            data = self._read_log_from(activity, offset)
+            offset += len(data)
+            text = decoder.decode(data, final=state in ("DONE", "FAILED", "ABORTED"))
+            if text:
+                yield text
+            if state in ("DONE", "FAILED", "ABORTED"):
+                return
+            if len(data) > 0:
+                intervals = polling_intervals(initial_interval, max_interval, backoff)
+            time.sleep(next(intervals))
+
+    def _read_log_from(self, activity, offset):
+        """
+        Get the bytes of the log after offset
+        """
+        headers = {"Accept-Encoding" : "identity"}
+        if offset > 0:
+            # Request the last byte already read too, so that the range is never empty: an empty range
+            # would be answered with a 416 error instead of an empty body
+            headers["Range"] = "bytes=%d-" % (offset - 1)
+        response = self.client._perform_raw(
+            "GET", "/projects/%s/jobs/%s/log" % (self.project_key, self.id),
+            params={
+                "activity" : activity
+            }, headers=headers)
+        try:
+            content = response.content
+            content_range = _CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+        finally:
+            response.close()
+        if response.status_code == 206:
+            if content_range is None or int(content_range.group(1)) != offset - 1:
+                raise DataikuException("Unexpected range %s when reading the log of job %s from byte %d"
+                                       % (response.headers.get("Content-Range"), self.id, offset - 1))
+            return content[1:]
+        # The range was ignored, the whole log was sent
+        return content[offset:]
+
+
+_CONTENT_RANGE = re.compile(r"bytes (\d+)-")
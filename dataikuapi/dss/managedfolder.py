@@ -146,6 +146,19 @@ class DSSManagedFolder(object):
                 "GET", "/projects/%s/managedfolders/%s/metrics/history" % (self.project_key, self.odb_id),
                 params={'metricLookup' : metric if isinstance(metric, str) or isinstance(metric, unicode) else json.dumps(metric)})
 
+    def iter_metric_history(self, metric):
+        """
+        Iterate over the history of the values of the metric on this managed folder, parsing the values
+        one at a time from the response instead of loading the whole history in memory
+
+        Returns:
+            an iterator over the values of the metric, see :meth:`get_metric_history`
+        """
+        return self.client._perform_json_items(
+                "GET", "/projects/%s/managedfolders/%s/metrics/history" % (self.project_key, self.odb_id),
+                params={'metricLookup' : metric if isinstance(metric, str) or isinstance(metric, unicode) else json.dumps(metric)},
+                key="values")
+
 
                 
     ########################################################
@@ -251,6 +251,17 @@ class DSSProject(object):
         return self.client._perform_json(
             "GET", "/projects/%s/jobs/" % self.project_key)
 
+    def iter_jobs(self):
+        """
+        Iterate over the jobs in this project, parsing them one at a time from the response instead
+        of loading the whole list in memory
+
+        Returns:
+            an iterator over the jobs, each one as a JSON object, containing both the definition and the state
+        """
+        return self.client._perform_json_items(
+            "GET", "/projects/%s/jobs/" % self.project_key)
+
     def get_job(self, id):
         """
         Get a handler to interact with a specific job
@@ -1,4 +1,10 @@
+from ..utils import poll_until, polling_intervals, wait_for_next_poll
+from ..polling import DEFAULT_SCHEDULER
 from datetime import datetime
+import time
+
+OUTCOMES = ("SUCCESS", "WARNING", "FAILED", "ABORTED")
+SUCCESSFUL_OUTCOMES = ("SUCCESS", "WARNING")
 
 class DSSScenario(object):
     """
@@ -26,6 +32,21 @@ class DSSScenario(object):
             "POST", "/projects/%s/scenarios/%s/run" % (self.project_key, self.id), body=params)
         return DSSTriggerFire(self, trigger_fire)
 
+    def run_and_wait(self, params={}, timeout=None, on_step=None, initial_interval=0.5, max_interval=10, backoff=1.5):
+        """
+        Requests a run of the scenario, and waits for it to finish.
+
+        :params dict params: additional parameters that will be passed to the scenario through trigger params
+        :param timeout: (optional) maximum time to wait, in seconds. A DataikuException is raised when it elapses
+        :param on_step: (optional) a function called with a :class:`DSSScenarioRunEvent` each time a step of the run finishes
+
+        :return: the finished :class:`dataikuapi.dss.scenario.DSSScenarioRun`
+        """
+        watcher = DSSScenarioRunWatcher(self.client, on_step=on_step, track_steps=on_step is not None,
+                                        initial_interval=initial_interval, max_interval=max_interval, backoff=backoff)
+        watcher.watch(self.run(params))
+        return watcher.wait(timeout)[0]
+
     def get_last_runs(self, limit=10, only_finished_runs=False):
         """
         Get the list of the last runs of the scenario.
@@ -153,17 +174,21 @@ class DSSScenarioRun(object):
         """
         return datetime.fromtimestamp(self.run['start'] / 1000)
 
+    def get_outcome(self):
+        """
+        Get the outcome of the run (SUCCESS, WARNING, FAILED or ABORTED), or None if it is still running
+        """
+        return self.run.get('result', {}).get('outcome')
+
     def get_duration(self):
         """
         Get the duration of this run (in fractional seconds).
 
         If the run is still running, get the duration since it started
         """
-        end_time = datetime.now()
         if self.run['end'] > 0:
-            end_time = datetime.fromtimestamp(self.run['end'] / 1000)
-        duration = (end_time - self.get_start_time()).total_seconds()
-        return duration
+            return (self.run['end'] - self.run['start']) / 1000.0
+        return time.time() - self.run['start'] / 1000.0
 
 class DSSTriggerFire(object):
     """
@@ -191,3 +216,178 @@ class DSSTriggerFire(object):
             return None
         else:
             return DSSScenarioRun(self.client, run['scenarioRun'])
+
+    def wait_for_scenario_run(self, timeout=None, initial_interval=0.05, max_interval=5, backoff=1.5):
+        """
+        Wait for the run of the scenario that this trigger activation launched to start, polling with
+        waits growing from initial_interval to max_interval seconds
+
+        Args:
+            timeout: (optional) maximum time to wait, in seconds. A DataikuException is raised when it elapses
+
+        Returns:
+            A :class:`dataikuapi.dss.scenario.DSSScenarioRun`
+        """
+        return poll_until(self.get_scenario_run, lambda run: run is not None, timeout, initial_interval, max_interval, backoff,
+                          "the run of scenario %s" % self.scenario_id)
+
+    def wait_for_scenario_run_async(self, timeout=None, initial_interval=0.05, max_interval=5, backoff=1.5, scheduler=None):
+        """
+        Wait for the run of the scenario that this trigger activation launched to start, in the background,
+        see :meth:`dataikuapi.dss.future.DSSFuture.result_async`
+
+        Returns:
+            a :class:`dataikuapi.polling.PendingResult`, whose result() is a :class:`dataikuapi.dss.scenario.DSSScenarioRun`
+        """
+        def poll():
+            run = self.get_scenario_run()
+            return (run is not None, run)
+        return (scheduler or DEFAULT_SCHEDULER).submit(poll, "the run of scenario %s" % self.scenario_id, timeout,
+                                                       initial_interval, max_interval, backoff)
+
+
+class DSSScenarioRunEvent(object):
+    """
+    A change in a scenario run tracked by a :class:`DSSScenarioRunWatcher`
+
+    Attributes:
+        type: "start" when the run started, "step" when a step finished, "finish" when the run finished
+        run: the :class:`DSSScenarioRun`
+        step_run: for "step" events, the step run as a JSON object
+        trigger_fire: the :class:`DSSTriggerFire` that launched the run
+    """
+    def __init__(self, type, run, trigger_fire, step_run=None):
+        self.type = type
+        self.run = run
+        self.trigger_fire = trigger_fire
+        self.step_run = step_run
+
+    def __repr__(self):
+        return "DSSScenarioRunEvent(%s, %s.%s, %s)" % (self.type, self.trigger_fire.project_key, self.trigger_fire.scenario_id, self.trigger_fire.run_id)
+
+
+class _WatchedRun(object):
+    def __init__(self, trigger_fire):
+        self.trigger_fire = trigger_fire
+        self.run = None
+        self.finished = False
+        self.steps_done = 0
+
+
+class DSSScenarioRunWatcher(object):
+    """
+    Tracks many scenario runs at once, and reports when they start, when their steps finish and when they finish.
+
+    Runs are polled in a single loop, with waits growing from initial_interval to max_interval seconds.
+    Once a run has started, it is polled through the last runs of its scenario, with one call per scenario
+    whatever the number of its runs being watched. Steps are only tracked when track_steps is True, at the
+    cost of one more call per running run and poll.
+
+    Events are passed to the on_start, on_step and on_finish callbacks, and yielded by :meth:`iter_events`.
+    """
+    def __init__(self, client, on_start=None, on_step=None, on_finish=None, track_steps=False,
+                 initial_interval=0.5, max_interval=10, backoff=1.5):
+        self.client = client
+        self.callbacks = {"start" : on_start, "step" : on_step, "finish" : on_finish}
+        self.track_steps = track_steps
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.watched = []
+
+    def watch(self, trigger_fire):
+        """
+        Start tracking the run launched by a :class:`DSSTriggerFire`, as returned by :meth:`DSSScenario.run`
+        """
+        self.watched.append(_WatchedRun(trigger_fire))
+
+    def is_done(self):
+        """
+        Whether all the watched runs finished
+        """
+        return all(watched.finished for watched in self.watched)
+
+    def get_runs(self):
+        """
+        Get the runs, in the order they were watched. Runs that did not start yet are None
+
+        :return: a list of :class:`DSSScenarioRun`
+        """
+        return [watched.run for watched in self.watched]
+
+    def wait(self, timeout=None):
+        """
+        Wait for all the watched runs to finish
+
+        :param timeout: (optional) maximum time to wait, in seconds. A DataikuException is raised when it elapses
+        :return: the list of finished :class:`DSSScenarioRun`, in the order they were watched
+        """
+        for event in self.iter_events(timeout):
+            pass
+        return self.get_runs()
+
+    def iter_events(self, timeout=None):
+        """
+        Poll the watched runs until they all finished, and yield the :class:`DSSScenarioRunEvent` of their changes
+
+        :param timeout: (optional) maximum time to wait, in seconds. A DataikuException is raised when it elapses
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        for interval in polling_intervals(self.initial_interval, self.max_interval, self.backoff):
+            for event in self.poll():
+                yield event
+            if self.is_done():
+                return
+            wait_for_next_poll(interval, deadline, timeout, "scenario runs")
+
+    def poll(self):
+        """
+        Poll the watched runs once. The callbacks are called with the events of the changes
+
+        :return: the list of :class:`DSSScenarioRunEvent` of the changes since the previous poll
+        """
+        events = self._poll()
+        for event in events:
+            callback = self.callbacks[event.type]
+            if callback is not None:
+                callback(event)
+        return events
+
+    def _poll(self):
+        events = []
+        by_scenario = {}
+        for watched in self.watched:
+            if watched.finished:
+                continue
+            if watched.run is None:
+                watched.run = watched.trigger_fire.get_scenario_run()
+                if watched.run is None:
+                    continue
+                events.append(DSSScenarioRunEvent("start", watched.run, watched.trigger_fire))
+            fire = watched.trigger_fire
+            by_scenario.setdefault((fire.project_key, fire.scenario_id), []).append(watched)
+
+        for ((project_key, scenario_id), runs) in by_scenario.items():
+            scenario = DSSScenario(self.client, project_key, scenario_id)
+            last_runs = dict((run.run['runId'], run) for run in scenario.get_last_runs(limit=max(10, 2 * len(runs))))
+            for watched in runs:
+                run = last_runs.get(watched.run.run['runId'])
+                if run is None:
+                    # Too many newer runs, poll this one on its own
+                    run = DSSScenarioRun(self.client, watched.run.get_details()['scenarioRun'])
+                watched.run = run
+                finished = 'result' in run.run
+                if self.track_steps:
+                    events.extend(self._poll_steps(watched))
+                if finished:
+                    watched.finished = True
+                    events.append(DSSScenarioRunEvent("finish", run, watched.trigger_fire))
+        return events
+
+    def _poll_steps(self, watched):
+        step_runs = watched.run.get_details().get('stepRuns', [])
+        events = []
+        while watched.steps_done < len(step_runs) and 'result' in step_runs[watched.steps_done]:
+            events.append(DSSScenarioRunEvent("step", watched.run, watched.trigger_fire, step_runs[watched.steps_done]))
+            watched.steps_done += 1
+        return events
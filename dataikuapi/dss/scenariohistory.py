@@ -0,0 +1,201 @@
+from ..bulk import map_concurrent
+from .scenario import DSSScenario, OUTCOMES, SUCCESSFUL_OUTCOMES
+from array import array
+import math
+
+class _ScenarioHistory(object):
+    """
+    The finished runs of a scenario, oldest first, stored as columns
+    """
+    def __init__(self, scenario):
+        self.scenario = scenario
+        # Start of the last stored run, in milliseconds as sent by DSS
+        self.last_start = None
+        self.starts = array('d')
+        self.durations = array('d')
+        self.outcomes = array('b')
+
+    def append(self, run):
+        self.starts.append(run['start'] / 1000.0)
+        self.durations.append((run['end'] - run['start']) / 1000.0)
+        outcome = run.get('result', {}).get('outcome')
+        self.outcomes.append(OUTCOMES.index(outcome) if outcome in OUTCOMES else -1)
+        self.last_start = run['start']
+
+    def truncate(self, max_runs):
+        excess = len(self.starts) - max_runs
+        if excess > 0:
+            del self.starts[:excess]
+            del self.durations[:excess]
+            del self.outcomes[:excess]
+
+
+class DSSScenarioHistoryStore(object):
+    """
+    A local store of the finished runs of many scenarios, to compute statistics on their durations and
+    outcomes without fetching their run histories on each query.
+
+    :meth:`refresh` fetches the histories concurrently. The first refresh of a scenario fetches up to max_runs
+    runs; the next ones only fetch the runs newer than the last one stored, with small calls first.
+    At most max_runs runs are kept per scenario.
+
+    Do not create this class directly, use :meth:`dataikuapi.dssclient.DSSClient.new_scenario_history_store`
+    """
+    def __init__(self, client, max_runs=1000, page_size=10):
+        self.client = client
+        self.max_runs = max_runs
+        self.page_size = page_size
+        self.histories = {}
+
+    def _key(self, scenario):
+        if isinstance(scenario, DSSScenario):
+            return "%s.%s" % (scenario.project_key, scenario.id)
+        return scenario
+
+    def add(self, scenario):
+        """
+        Add a scenario to the store. Its history is fetched by the next :meth:`refresh`
+
+        Args:
+            scenario: a :class:`dataikuapi.dss.scenario.DSSScenario`, or its "PROJECTKEY.scenarioId" key
+
+        Returns:
+            the "PROJECTKEY.scenarioId" key of the scenario, which can be used instead of the scenario
+            in the other methods
+        """
+        key = self._key(scenario)
+        if key not in self.histories:
+            if not isinstance(scenario, DSSScenario):
+                if "." not in key:
+                    raise ValueError("Invalid scenario key %s, expected PROJECTKEY.scenarioId" % key)
+                scenario = DSSScenario(self.client, *key.split(".", 1))
+            self.histories[key] = _ScenarioHistory(scenario)
+        return key
+
+    def list_scenarios(self):
+        """
+        Get the keys of the scenarios in the store
+        """
+        return sorted(self.histories.keys())
+
+    ########################################################
+    # Fetching
+    ########################################################
+
+    def refresh(self, scenarios=None, max_workers=8):
+        """
+        Fetch the runs that finished since the previous refresh
+
+        Args:
+            scenarios: (optional) the scenarios to refresh. Defaults to all the scenarios of the store
+            max_workers: the maximum number of histories fetched at the same time
+
+        Returns:
+            the number of new runs, by scenario key
+        """
+        keys = self.list_scenarios() if scenarios is None else [self.add(scenario) for scenario in scenarios]
+        results = map_concurrent(lambda key: self._refresh_history(self.histories[key]), keys, max_workers)
+        for result in results:
+            if not result.is_success():
+                result.get()
+        return dict((result.item, result.value) for result in results)
+
+    def _refresh_history(self, history):
+        limit = self.max_runs if history.last_start is None else min(self.page_size, self.max_runs)
+        while True:
+            runs = history.scenario.get_last_runs(limit=limit, only_finished_runs=True)
+            if history.last_start is not None:
+                # New runs started after the last stored one. The stored runs themselves may have been
+                # deleted on DSS, so they are not looked for
+                new_runs = [run for run in runs if run.run['start'] > history.last_start]
+                if len(new_runs) < len(runs):
+                    runs = new_runs
+                    break
+            if len(runs) < limit or limit >= self.max_runs:
+                # The whole history, or as much of it as is kept
+                break
+            limit = min(limit * 4, self.max_runs)
+        # Runs come newest first
+        for run in reversed(runs):
+            history.append(run.run)
+        history.truncate(self.max_runs)
+        return len(runs)
+
+    ########################################################
+    # Statistics
+    ########################################################
+
+    def _get_history(self, scenario):
+        key = self._key(scenario)
+        if key not in self.histories:
+            raise ValueError("Scenario %s is not in the store" % key)
+        return self.histories[key]
+
+    def get_durations(self, scenario, last=None, only_successful=True):
+        """
+        Get the durations of the stored runs of a scenario, oldest first
+
+        Args:
+            last: (optional) only consider this number of most recent runs
+            only_successful: if True, only the durations of the runs that ended with SUCCESS or WARNING are returned
+
+        Returns:
+            an array.array of durations in fractional seconds
+        """
+        history = self._get_history(scenario)
+        start = 0 if last is None else max(0, len(history.durations) - last)
+        if not only_successful:
+            return history.durations[start:]
+        successful = [OUTCOMES.index(outcome) for outcome in SUCCESSFUL_OUTCOMES]
+        return array('d', (duration for (duration, outcome) in zip(history.durations[start:], history.outcomes[start:])
+                           if outcome in successful))
+
+    def get_stats(self, scenario, percentiles=(50, 90, 95, 99), last=None):
+        """
+        Get statistics on the stored runs of a scenario
+
+        Args:
+            percentiles: the percentiles of the durations to compute
+            last: (optional) only consider this number of most recent runs
+
+        Returns:
+            a dict with the number of runs, the failure rate (the share of runs that did not end with SUCCESS
+            or WARNING), and the mean, min, max and percentiles of the durations of the successful runs, in
+            fractional seconds (None when there is no successful run)
+        """
+        history = self._get_history(scenario)
+        start = 0 if last is None else max(0, len(history.outcomes) - last)
+        runs = len(history.outcomes) - start
+        durations = sorted(self.get_durations(scenario, last))
+        stats = {
+            "runs" : runs,
+            "successfulRuns" : len(durations),
+            "failureRate" : float(runs - len(durations)) / runs if runs > 0 else None,
+            "lastStart" : history.starts[-1] if runs > 0 else None,
+            "meanDuration" : math.fsum(durations) / len(durations) if len(durations) > 0 else None,
+            "minDuration" : durations[0] if len(durations) > 0 else None,
+            "maxDuration" : durations[-1] if len(durations) > 0 else None,
+            "percentiles" : dict((p, _percentile(durations, p)) for p in percentiles)
+        }
+        return stats
+
+    def get_all_stats(self, percentiles=(50, 90, 95, 99), last=None):
+        """
+        Get the statistics of all the scenarios of the store, see :meth:`get_stats`
+
+        Returns:
+            a dict of statistics by scenario key
+        """
+        return dict((key, self.get_stats(key, percentiles, last)) for key in self.list_scenarios())
+
+
+def _percentile(sorted_values, p):
+    """
+    The p-th percentile of sorted values, interpolated linearly between the closest ranks
+    """
+    if len(sorted_values) == 0:
+        return None
+    rank = (len(sorted_values) - 1) * p / 100.0
+    low = int(math.floor(rank))
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
@@ -0,0 +1,221 @@
+from ..utils import polling_intervals, wait_for_next_poll
+from .scenario import DSSScenarioRunWatcher, SUCCESSFUL_OUTCOMES
+import time
+
+class _ScheduledScenario(object):
+    def __init__(self, scenario, params, depends_on):
+        self.scenario = scenario
+        self.params = params
+        self.depends_on = depends_on
+        self.dependents = []
+        self.state = "PENDING"
+        self.outcome = None
+        self.error = None
+        self.run = None
+        self.ready_time = None
+        self.launch_time = None
+        self.end_time = None
+        self.critical_predecessor = None
+
+    def key(self):
+        return _key(self.scenario.project_key, self.scenario.id)
+
+
+def _key(project_key, scenario_id):
+    return "%s.%s" % (project_key, scenario_id)
+
+
+class DSSScenarioScheduler(object):
+    """
+    Runs many scenarios, possibly across projects, in the order given by their dependencies and within
+    concurrency limits.
+
+    A scenario is launched when all the scenarios it depends on finished with SUCCESS or WARNING, and a slot
+    is free: at most max_running scenarios run at the same time, and at most max_running_per_project of
+    the same project. Scenarios depending on a scenario that failed (or could not be launched) are skipped.
+    Running scenarios are tracked with a :class:`dataikuapi.dss.scenario.DSSScenarioRunWatcher`.
+
+    Do not create this class directly, use :meth:`dataikuapi.dssclient.DSSClient.new_scenario_scheduler`
+    """
+    def __init__(self, client, max_running=10, max_running_per_project=None, initial_interval=0.5, max_interval=10, backoff=1.5):
+        # Without a slot, no scenario could ever be launched
+        if max_running is None or max_running < 1:
+            raise ValueError("max_running must be at least 1, got %s" % max_running)
+        if max_running_per_project is not None and max_running_per_project < 1:
+            raise ValueError("max_running_per_project must be at least 1, got %s" % max_running_per_project)
+        self.client = client
+        self.max_running = max_running
+        self.max_running_per_project = max_running_per_project
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.scheduled = []
+        self.by_key = {}
+
+    def add(self, scenario, depends_on=[], params={}):
+        """
+        Add a scenario to run
+
+        Args:
+            scenario: a :class:`dataikuapi.dss.scenario.DSSScenario`
+            depends_on: the scenarios that must finish successfully before this one is launched, each one
+                as a :class:`dataikuapi.dss.scenario.DSSScenario` or a "PROJECTKEY.scenarioId" string. They
+                must be added to the scheduler too, before :meth:`run` is called
+            params: additional parameters passed to the scenario through trigger params
+
+        Returns:
+            the "PROJECTKEY.scenarioId" key of the scenario in the report of :meth:`run`
+        """
+        keys = [dependency if isinstance(dependency, basestring) else _key(dependency.project_key, dependency.id)
+                for dependency in depends_on]
+        scheduled = _ScheduledScenario(scenario, params, keys)
+        key = scheduled.key()
+        if key in self.by_key:
+            raise ValueError("Scenario %s is already scheduled" % key)
+        self.scheduled.append(scheduled)
+        self.by_key[key] = scheduled
+        return key
+
+    def _resolve_dependencies(self):
+        for scheduled in self.scheduled:
+            scheduled.dependents = []
+        for scheduled in self.scheduled:
+            for key in scheduled.depends_on:
+                if key not in self.by_key:
+                    raise ValueError("Scenario %s depends on %s, which is not scheduled" % (scheduled.key(), key))
+                self.by_key[key].dependents.append(scheduled)
+
+        # Kahn's algorithm: whatever is not reached is part of a cycle
+        remaining = dict((scheduled.key(), len(scheduled.depends_on)) for scheduled in self.scheduled)
+        ready = [scheduled for scheduled in self.scheduled if remaining[scheduled.key()] == 0]
+        reached = 0
+        while len(ready) > 0:
+            scheduled = ready.pop()
+            reached += 1
+            for dependent in scheduled.dependents:
+                remaining[dependent.key()] -= 1
+                if remaining[dependent.key()] == 0:
+                    ready.append(dependent)
+        if reached < len(self.scheduled):
+            cycle = sorted(key for (key, count) in remaining.items() if count > 0)
+            raise ValueError("The dependencies between scenarios have a cycle, through %s" % ", ".join(cycle))
+
+    def run(self, timeout=None, on_start=None, on_finish=None):
+        """
+        Run all the added scenarios, and wait for them to finish or be skipped
+
+        Args:
+            timeout: (optional) maximum time to wait, in seconds. A DataikuException is raised when it elapses
+            on_start, on_finish: (optional) functions called with a :class:`dataikuapi.dss.scenario.DSSScenarioRunEvent`
+                when a run starts and when it finishes
+
+        Returns:
+            a report, as a dict with:
+
+            * "outcomes": the outcome of each scenario by key: SUCCESS, WARNING, FAILED, ABORTED, or SKIPPED
+            * "runs": the :class:`dataikuapi.dss.scenario.DSSScenarioRun` of each launched scenario by key
+            * "errors": the error that prevented launching a scenario, by key
+            * "timings": by key, the seconds spent waiting for a free slot once the dependencies were done
+              ("queuedSeconds"), the seconds between the launch and the end of the run ("runSeconds"), and
+              when the run ended, in seconds since the start of the schedule ("endSeconds")
+            * "criticalPath": the keys of the chain of dependent scenarios that ended last, which sets the
+              duration of the whole schedule
+            * "totalSeconds": the duration of the whole schedule
+        """
+        self._resolve_dependencies()
+        watcher = DSSScenarioRunWatcher(self.client, on_start=on_start, on_finish=on_finish)
+        by_trigger = {}
+        self.start_time = time.time()
+        deadline = None if timeout is None else self.start_time + timeout
+        for scheduled in self.scheduled:
+            if len(scheduled.depends_on) == 0:
+                scheduled.ready_time = self.start_time
+
+        intervals = polling_intervals(self.initial_interval, self.max_interval, self.backoff)
+        while True:
+            launched = self._launch_ready(watcher, by_trigger)
+            if len(watcher.watched) == 0 or watcher.is_done():
+                if not any(scheduled.state == "PENDING" and scheduled.ready_time is not None for scheduled in self.scheduled):
+                    break
+            finished = [event for event in watcher.poll() if event.type == "finish"]
+            for event in finished:
+                self._on_finished(by_trigger[id(event.trigger_fire)], event.run)
+            if launched or len(finished) > 0:
+                # Something changed, so poll closely again
+                intervals = polling_intervals(self.initial_interval, self.max_interval, self.backoff)
+            # When no launched scenario is running, the next ones are launched without waiting
+            interval = next(intervals) if not watcher.is_done() else 0
+            wait_for_next_poll(interval, deadline, timeout, "the scheduled scenarios")
+        return self._report()
+
+    def _running_count(self, project_key=None):
+        return len([scheduled for scheduled in self.scheduled
+                    if scheduled.state == "RUNNING" and (project_key is None or scheduled.scenario.project_key == project_key)])
+
+    def _launch_ready(self, watcher, by_trigger):
+        launched = False
+        for scheduled in self.scheduled:
+            if scheduled.state != "PENDING" or scheduled.ready_time is None:
+                continue
+            if self._running_count() >= self.max_running:
+                break
+            if self.max_running_per_project is not None and \
+                    self._running_count(scheduled.scenario.project_key) >= self.max_running_per_project:
+                continue
+            scheduled.launch_time = time.time()
+            launched = True
+            try:
+                trigger_fire = scheduled.scenario.run(scheduled.params)
+            except Exception as e:
+                scheduled.error = str(e)
+                self._on_finished(scheduled, None)
+                continue
+            scheduled.state = "RUNNING"
+            by_trigger[id(trigger_fire)] = scheduled
+            watcher.watch(trigger_fire)
+        return launched
+
+    def _on_finished(self, scheduled, run):
+        scheduled.state = "DONE"
+        scheduled.run = run
+        scheduled.outcome = run.get_outcome() if run is not None else "FAILED"
+        scheduled.end_time = time.time()
+        if scheduled.outcome not in SUCCESSFUL_OUTCOMES:
+            self._skip_dependents(scheduled)
+            return
+        for dependent in scheduled.dependents:
+            dependencies = [self.by_key[key] for key in dependent.depends_on]
+            if dependent.state == "PENDING" and all(dependency.state == "DONE" for dependency in dependencies):
+                dependent.ready_time = scheduled.end_time
+                dependent.critical_predecessor = max(dependencies, key=lambda dependency: dependency.end_time)
+
+    def _skip_dependents(self, scheduled):
+        for dependent in scheduled.dependents:
+            if dependent.state == "PENDING":
+                dependent.state = "SKIPPED"
+                dependent.outcome = "SKIPPED"
+                self._skip_dependents(dependent)
+
+    def _report(self):
+        ended = [scheduled for scheduled in self.scheduled if scheduled.end_time is not None]
+        critical_path = []
+        if len(ended) > 0:
+            scheduled = max(ended, key=lambda scheduled: scheduled.end_time)
+            while scheduled is not None:
+                critical_path.insert(0, scheduled.key())
+                scheduled = scheduled.critical_predecessor
+        timings = {}
+        for scheduled in ended:
+            timings[scheduled.key()] = {
+                "queuedSeconds" : scheduled.launch_time - scheduled.ready_time,
+                "runSeconds" : scheduled.end_time - scheduled.launch_time,
+                "endSeconds" : scheduled.end_time - self.start_time
+            }
+        return {
+            "outcomes" : dict((scheduled.key(), scheduled.outcome) for scheduled in self.scheduled),
+            "runs" : dict((scheduled.key(), scheduled.run) for scheduled in self.scheduled if scheduled.run is not None),
+            "errors" : dict((scheduled.key(), scheduled.error) for scheduled in self.scheduled if scheduled.error is not None),
+            "timings" : timings,
+            "criticalPath" : critical_path,
+            "totalSeconds" : time.time() - self.start_time
+        }
@@ -40,21 +40,83 @@ class DSSSQLQuery(object):
         """
         return self.streaming_session['schema']
 
-    def iter_rows(self):
+    def iter_rows(self, prefetch=False, row_type="list"):
         """
         Get the query's results
+
+        Args:
+            prefetch: if True, the results are read from the network by a background thread while rows
+                are decoded
+            row_type: the type of the rows: "list", "tuple", "record" or "buffer". See :func:`dataikuapi.utils.make_row_decoder`
         
         Returns:
             an iterator over the rows, each row being a tuple of values. The order of values
             in the tuples is the same as the order of columns in the schema returned by get_schema
         """
+        return self._get_data_reader(prefetch).iter_rows(row_type)
+
+    def iter_batches(self, batch_size=10000, prefetch=False):
+        """
+        Get the query's results by batches of columns. Requires numpy and pandas.
+
+        Args:
+            batch_size: the maximum number of rows in each batch
+            prefetch: see :meth:`iter_rows`
+
+        Returns:
+            an iterator over the batches, each batch being an ordered dict of column name to numpy array,
+            with the same types in all batches. Integer and boolean columns are masked arrays of int64 and
+            bool, floating point columns are float64, date columns are datetime64 and other columns are
+            objects. See :meth:`dataikuapi.utils.DataikuStreamedHttpUTF8CSVReader.iter_batches`
+        """
+        return self._get_data_reader(prefetch).iter_batches(batch_size)
+
+    def to_dataframe(self):
+        """
+        Get the query's results as a pandas DataFrame. Requires numpy and pandas.
+
+        Returns:
+            a pandas DataFrame, see :meth:`dataikuapi.utils.DataikuStreamedHttpUTF8CSVReader.to_dataframe` for the column types
+        """
+        return self._get_data_reader().to_dataframe()
+
+    def iter_arrow_batches(self, batch_size=10000):
+        """
+        Get the query's results as Arrow record batches. Requires pyarrow, numpy and pandas.
+
+        Returns:
+            an iterator over pyarrow.RecordBatch objects, all having the schema built from get_schema
+        """
+        return self._get_data_reader().iter_arrow_batches(batch_size)
+
+    def export_to_parquet(self, path, batch_size=10000, compression="snappy"):
+        """
+        Write the query's results to a local Parquet file, holding at most batch_size rows in memory. Requires pyarrow, numpy and pandas.
+
+        Args:
+            path: the path of the file to write
+            compression: the Parquet compression codec
+        """
+        self._get_data_reader().write_parquet(path, batch_size, compression)
+
+    def export_to_arrow_ipc(self, path, batch_size=10000):
+        """
+        Write the query's results to a local Arrow IPC file, holding at most batch_size rows in memory. Requires pyarrow, numpy and pandas.
+        See :meth:`dataikuapi.utils.DataikuStreamedHttpUTF8CSVReader.write_arrow_ipc`
+
+        Args:
+            path: the path of the file to write
+        """
+        self._get_data_reader().write_arrow_ipc(path, batch_size)
+
+    def _get_data_reader(self, prefetch=False):
         csv_stream = self.client._perform_raw(
                 "GET", "/sql/queries/%s/stream" % (self.queryId),
                 params = {
                     "format" : "tsv-excel-noheader"
                 })
 
-        return DataikuStreamedHttpUTF8CSVReader(self.get_schema(), csv_stream).iter_rows()
+        return DataikuStreamedHttpUTF8CSVReader(self.get_schema(), csv_stream, prefetch=prefetch)
 
     def verify(self):
         """
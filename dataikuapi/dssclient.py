@@ -1,38 +1,71 @@
-import json
-from requests import Session
-from requests import exceptions
 from requests.auth import HTTPBasicAuth
 
-from dss.future import DSSFuture
+from dss.future import DSSFuture, iter_completed_futures
 from dss.project import DSSProject
 from dss.plugin import DSSPlugin
 from dss.admin import DSSUser, DSSGroup, DSSConnection, DSSGeneralSettings
 from dss.meaning import DSSMeaning
 from dss.sqlquery import DSSSQLQuery
 from dss.notebook import DSSNotebook
+from dss.scenarioscheduler import DSSScenarioScheduler
+from dss.scenariohistory import DSSScenarioHistoryStore
 import os.path as osp
-from .utils import DataikuException
+from .utils import ExpiringLRUCache, iter_json_array
+from .transport import new_session, send_with_retries, check_response, compress_body, get_json_codec
+from .bulk import DSSBulkExecutor, map_concurrent
 
 class DSSClient(object):
     """Entry point for the DSS API client"""
 
-    def __init__(self, host, api_key=None, internal_ticket = None):
+    def __init__(self, host, api_key=None, internal_ticket = None, session=None,
+                 pool_connections=10, pool_maxsize=10, pool_block=False, keep_alive=True,
+                 retry_policy=None, schema_cache_size=1000, schema_cache_ttl=0,
+                 accept_encoding="gzip, deflate", compress_requests=False, json_codec=None):
         """
         Instantiate a new DSS API client on the given host with the given API key.
 
         API keys can be managed in DSS on the project page or in the global settings.
 
         The API key will define which operations are allowed for the client.
+
+        The connection pool can be tuned with pool_connections, pool_maxsize, pool_block and keep_alive
+        (see :func:`dataikuapi.transport.new_session`). Alternatively, a session created by
+        :func:`dataikuapi.transport.new_session` can be passed as session, in which case it is shared
+        with the other clients using it and the pool parameters are ignored.
+
+        Calls failing with transient errors are retried according to retry_policy, a
+        :class:`dataikuapi.transport.RetryPolicy`. By default, calls are not retried.
+
+        When schema_cache_ttl is greater than 0, dataset schemas are kept for that many seconds (for at most
+        schema_cache_size datasets) and reused when reading datasets' data, instead of being fetched
+        before each read. Setting the schema or the definition of a dataset with this client, or calling
+        its get_schema(), refreshes its cached schema.
+
+        accept_encoding is the list of compressions accepted for responses (None to only accept
+        uncompressed responses). Compressed responses, including streamed data, are decompressed on the fly.
+        When compress_requests is True, JSON request bodies larger than 1KB are sent gzip-compressed,
+        which requires the DSS server (or a proxy in front of it) to accept compressed requests.
+
+        JSON is encoded and decoded with json_codec, a :class:`dataikuapi.transport.JSONCodec`. By default,
+        the fastest installed JSON library is used (see :func:`dataikuapi.transport.get_json_codec`).
         """
         self.api_key = api_key
         self.internal_ticket = internal_ticket
         self.host = host
-        self._session = Session()
+        if session is None:
+            session = new_session(pool_connections, pool_maxsize, pool_block, keep_alive)
+        self._session = session
+        self._retry_policy = retry_policy
+        self._schema_cache = ExpiringLRUCache(schema_cache_size, schema_cache_ttl)
+        self._auth = None
+        self._headers = {"Accept-Encoding" : accept_encoding or "identity"}
+        self._compress_requests = compress_requests
+        self._json_codec = json_codec or get_json_codec()
 
         if self.api_key is not None:
-            self._session.auth = HTTPBasicAuth(self.api_key, "")
+            self._auth = HTTPBasicAuth(self.api_key, "")
         elif self.internal_ticket is not None:
-            self._session.headers.update({"X-DKU-APITicket" : self.internal_ticket})
+            self._headers["X-DKU-APITicket"] = self.internal_ticket
         else:
             raise ValueError("API Key is required")
             
@@ -54,6 +87,54 @@ class DSSClient(object):
         else:
             return list
 
+    def iter_futures(self, as_objects=False, all_users=False):
+        """
+        Iterate over the currently-running long tasks (a.k.a futures), parsing them one at a time
+        from the response instead of loading the whole list in memory
+
+        Returns:
+            an iterator over the futures, see :meth:`list_futures`
+        """
+        states = self._perform_json_items("GET", "/futures/", params={"withScenarios":False, "withNotScenarios":True, 'allUsers' : all_users})
+        for state in states:
+            yield DSSFuture(self, state['jobId'], state) if as_objects else state
+
+    def wait_futures(self, futures, mode="all", timeout=None, initial_interval=0.05, max_interval=5, backoff=1.5, all_users=False):
+        """
+        Wait for many futures at once. The futures are polled together with a single listing call per poll,
+        with waits growing from initial_interval to max_interval seconds like in
+        :meth:`dataikuapi.dss.future.DSSFuture.wait_for_result`
+
+        Args:
+            futures: a list of :class:`dataikuapi.dss.future.DSSFuture`
+            mode: "all" to wait for all the futures, "any" to wait for the first one to complete, or
+                "as_completed" to iterate over the futures as they complete
+            timeout: (optional) maximum time to wait, in seconds. A DataikuException is raised when it elapses
+            all_users: set to True if some of the futures were started by other users
+
+        Returns:
+            for "all", the list of the futures, in the same order. For "any", the first completed future.
+            For "as_completed", an iterator over the futures in the order they complete.
+            The result of a completed future is then available with its get_result() method
+        """
+        futures = list(futures)
+        completed = iter_completed_futures(self, futures, timeout, initial_interval, max_interval, backoff, all_users)
+        if mode == "as_completed":
+            return completed
+        elif mode == "any":
+            try:
+                return next(completed)
+            except StopIteration:
+                raise ValueError("No future to wait for")
+            finally:
+                completed.close()
+        elif mode == "all":
+            for future in completed:
+                pass
+            return futures
+        else:
+            raise ValueError("Unknown wait mode %s, expected all, any or as_completed" % mode)
+
     def list_running_scenarios(self, all_users=False):
         """
         List the running scenarios
@@ -76,6 +157,32 @@ class DSSClient(object):
         """
         return DSSFuture(self, job_id)
 
+    def new_scenario_scheduler(self, max_running=10, max_running_per_project=None):
+        """
+        Create a scheduler to run many scenarios, in the order of their dependencies and within concurrency limits
+
+        Args:
+            max_running: maximum number of scenarios running at the same time
+            max_running_per_project: (optional) maximum number of scenarios of the same project running at the same time
+
+        Returns:
+            A :class:`dataikuapi.dss.scenarioscheduler.DSSScenarioScheduler`
+        """
+        return DSSScenarioScheduler(self, max_running, max_running_per_project)
+
+    def new_scenario_history_store(self, max_runs=1000):
+        """
+        Create a store of the run histories of scenarios, fetched concurrently and incrementally, to compute
+        statistics on their durations and outcomes
+
+        Args:
+            max_runs: maximum number of runs kept for each scenario
+
+        Returns:
+            A :class:`dataikuapi.dss.scenariohistory.DSSScenarioHistoryStore`
+        """
+        return DSSScenarioHistoryStore(self, max_runs)
+
 
     ########################################################
     # Notebooks
@@ -154,6 +261,12 @@ class DSSClient(object):
                })
         return DSSProject(self, project_key)
 
+    def clear_schema_cache(self):
+        """
+        Forget all the dataset schemas cached by this client
+        """
+        self._schema_cache.clear()
+
     ########################################################
     # Plugins
     ########################################################
@@ -503,6 +616,38 @@ class DSSClient(object):
         return DSSGeneralSettings(self)
 
 
+    ########################################################
+    # Concurrent calls
+    ########################################################
+
+    def bulk(self, max_workers=8):
+        """
+        Get an executor to run many calls on DSS handles concurrently. Calls are added with
+        submit(), then run with execute() in a bounded pool of threads sharing this client's session.
+
+        The pool_maxsize of the client should be at least max_workers, otherwise connections are
+        reopened for each call.
+
+        :param int max_workers: maximum number of calls running at the same time
+
+        :return: A :class:`dataikuapi.bulk.DSSBulkExecutor`
+        """
+        return DSSBulkExecutor(max_workers)
+
+    def map_concurrent(self, func, items, max_workers=8):
+        """
+        Call func on each item in a bounded pool of threads sharing this client's session, for example
+        client.map_concurrent(lambda key: client.get_project(key).list_datasets(), client.list_project_keys())
+
+        :param func: a function taking a single argument
+        :param items: the arguments to call func on
+        :param int max_workers: maximum number of calls running at the same time
+
+        :return: a list of :class:`dataikuapi.bulk.BulkCallResult`, in the same order as items. Exceptions
+            raised by the calls are captured in the results
+        """
+        return map_concurrent(func, items, max_workers)
+
     ########################################################
     # Bundles / Import (Automation node)
     ########################################################
@@ -535,26 +680,30 @@ class DSSClient(object):
     # Internal Request handling
     ########################################################
 
-    def _perform_http(self, method, path, params=None, body=None, stream=False, files=None, raw_body=None):
+    def _perform_http(self, method, path, params=None, body=None, stream=False, files=None, raw_body=None, headers=None):
+        extra_headers = headers
+        headers = self._headers
         if body is not None:
-            body = json.dumps(body)
+            body = self._json_codec.dumps(body)
+            if self._compress_requests:
+                (body, headers) = compress_body(body, headers)
         if raw_body is not None:
             body = raw_body
+            headers = self._headers
+        if extra_headers is not None:
+            headers = dict(headers)
+            headers.update(extra_headers)
 
-        try:
-            http_res = self._session.request(
+        def send():
+            return self._session.request(
                     method, "%s/dip/publicapi%s" % (self.host, path),
                     params=params, data=body,
                     files = files,
+                    auth=self._auth, headers=headers,
                     stream = stream)
-            http_res.raise_for_status()
-            return http_res
-        except exceptions.HTTPError:
-            try:
-                ex = http_res.json()
-            except ValueError:
-                ex = {"message": http_res.text}
-            raise DataikuException("%s: %s" % (ex.get("errorType", "Unknown error"), ex.get("message", "No message")))
+
+        replayable = files is None and not hasattr(body, "read")
+        return check_response(send_with_retries(self._retry_policy, method, send, replayable))
 
     def _perform_empty(self, method, path, params=None, body=None, files = None, raw_body=None):
         self._perform_http(method, path, params=params, body=body, files=files, stream=False, raw_body=raw_body)
@@ -563,21 +712,27 @@ class DSSClient(object):
         return self._perform_http(method, path, params=params, body=body, files=files, stream=False, raw_body=raw_body).text
 
     def _perform_json(self, method, path, params=None, body=None,files=None, raw_body=None):
-        return self._perform_http(method, path,  params=params, body=body, files=files, stream=False, raw_body=raw_body).json()
+        return self._json_codec.loads(self._perform_http(method, path,  params=params, body=body, files=files, stream=False, raw_body=raw_body).content)
 
-    def _perform_raw(self, method, path, params=None, body=None,files=None, raw_body=None):
-        return self._perform_http(method, path, params=params, body=body, files=files, stream=True, raw_body=raw_body)
+    def _perform_raw(self, method, path, params=None, body=None,files=None, raw_body=None, headers=None):
+        return self._perform_http(method, path, params=params, body=body, files=files, stream=True, raw_body=raw_body, headers=headers)
 
-    def _perform_json_upload(self, method, path, name, f):
+    def _perform_json_items(self, method, path, params=None, body=None, key=None):
+        """
+        Streams the items of a JSON array response (or of the array under the given top-level key)
+        """
+        stream = self._perform_raw(method, path, params=params, body=body)
         try:
-            http_res = self._session.request(
+            for item in iter_json_array(stream.iter_content(chunk_size=65536), key, self._json_codec.loads):
+                yield item
+        finally:
+            stream.close()
+
+    def _perform_json_upload(self, method, path, name, f):
+        return check_response(self._session.request(
                     method, "%s/dip/publicapi%s" % (self.host, path),
-                    files = {'file': (name, f, {'Expires': '0'})} )
-            http_res.raise_for_status()
-            return http_res
-        except exceptions.HTTPError:
-            ex = http_res.json()
-            raise DataikuException("%s: %s" % (ex.get("errorType", "Unknown error"), ex.get("message", "No message")))
+                    files = {'file': (name, f, {'Expires': '0'})},
+                    auth=self._auth, headers=self._headers))
 
 
 class TemporaryImportHandle(object):
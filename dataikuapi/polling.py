@@ -0,0 +1,185 @@
+import heapq, itertools, sys, threading, time
+from .utils import DataikuException, polling_intervals
+
+class PendingResult(object):
+    """
+    The eventual outcome of an operation tracked by a :class:`PollingScheduler`, similar to a
+    concurrent.futures.Future.
+
+    Do not create this class directly, use methods like :meth:`dataikuapi.dss.future.DSSFuture.result_async`
+    """
+    def __init__(self, description):
+        self.description = description
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._value = None
+        self._exc_info = None
+        self._cancelled = False
+        self._callbacks = []
+
+    def done(self):
+        """
+        Whether the operation completed, failed or was cancelled
+        """
+        return self._done.is_set()
+
+    def cancelled(self):
+        return self._cancelled
+
+    def cancel(self):
+        """
+        Stop tracking the operation. This does not abort the operation on the DSS instance
+
+        :return: False if the operation was already done
+        """
+        with self._lock:
+            if self._done.is_set():
+                return False
+            self._cancelled = True
+        self._finish(exc_info=(DataikuException, DataikuException("Stopped waiting for %s" % self.description), None))
+        return True
+
+    def _wait(self, timeout):
+        deadline = None if timeout is None else time.time() + timeout
+        # Wait with a timeout so that the calling thread stays interruptible
+        while not self._done.wait(0.1):
+            if deadline is not None and time.time() >= deadline:
+                raise DataikuException("Timed out after %ss waiting for %s" % (timeout, self.description))
+
+    def result(self, timeout=None):
+        """
+        Wait for the operation and get its result, or re-raise the exception it failed with
+
+        :param timeout: (optional) maximum time to wait, in seconds. A DataikuException is raised when it elapses
+        """
+        self._wait(timeout)
+        if self._exc_info is not None:
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+        return self._value
+
+    def exception(self, timeout=None):
+        """
+        Wait for the operation and get the exception it failed with, or None if it succeeded
+        """
+        self._wait(timeout)
+        return None if self._exc_info is None else self._exc_info[1]
+
+    def add_done_callback(self, callback):
+        """
+        Call callback(pending_result) when the operation is done. The callback is called in the scheduler's
+        thread, so it should be quick; it is called immediately if the operation is already done
+        """
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _finish(self, value=None, exc_info=None):
+        with self._lock:
+            if self._done.is_set():
+                return
+            self._value = value
+            self._exc_info = exc_info
+            self._done.set()
+            callbacks = self._callbacks
+            self._callbacks = []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception:
+                pass
+
+    def __repr__(self):
+        if not self.done():
+            state = "pending"
+        elif self._exc_info is not None:
+            state = "error=%r" % (self._exc_info[1],)
+        else:
+            state = "value=%r" % (self._value,)
+        return "PendingResult(%s, %s)" % (self.description, state)
+
+
+class _PollingTask(object):
+    def __init__(self, poll, pending, deadline, intervals):
+        self.poll = poll
+        self.pending = pending
+        self.deadline = deadline
+        self.intervals = intervals
+
+
+class PollingScheduler(object):
+    """
+    Tracks many long-running operations from a single background thread.
+
+    Each operation is polled with waits growing geometrically (see :func:`dataikuapi.utils.polling_intervals`),
+    so that thousands of outstanding operations cost one thread and a bounded rate of cheap calls. The thread
+    is started when operations are submitted and stops when none are left.
+    """
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._tasks = []
+        self._sequence = itertools.count()
+        self._thread = None
+
+    def submit(self, poll, description="operation", timeout=None, initial_interval=0.05, max_interval=5, backoff=1.5):
+        """
+        Track an operation
+
+        :param poll: a function checking the operation, and returning a (done, value) tuple. value is the
+            result of the operation when done is True. If poll raises, the operation fails with the exception
+        :param str description: the name of the operation, used in error messages
+        :param timeout: (optional) the operation fails with a DataikuException if it is not done after timeout seconds
+
+        :return: a :class:`PendingResult`
+        """
+        pending = PendingResult(description)
+        deadline = None if timeout is None else time.time() + timeout
+        self._schedule(_PollingTask(poll, pending, deadline, polling_intervals(initial_interval, max_interval, backoff)), time.time())
+        return pending
+
+    def _schedule(self, task, when):
+        with self._condition:
+            heapq.heappush(self._tasks, (when, next(self._sequence), task))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run)
+                self._thread.daemon = True
+                self._thread.start()
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if len(self._tasks) == 0:
+                    self._thread = None
+                    return
+                (when, sequence, task) = self._tasks[0]
+                now = time.time()
+                if when > now:
+                    self._condition.wait(when - now)
+                    continue
+                heapq.heappop(self._tasks)
+            self._poll(task)
+
+    def _poll(self, task):
+        if task.pending.done():
+            return
+        try:
+            (done, value) = task.poll()
+        except Exception:
+            task.pending._finish(exc_info=sys.exc_info())
+            return
+        if done:
+            task.pending._finish(value)
+            return
+        now = time.time()
+        when = now + next(task.intervals)
+        if task.deadline is not None:
+            if now >= task.deadline:
+                task.pending._finish(exc_info=(DataikuException, DataikuException("Timed out waiting for %s" % task.pending.description), None))
+                return
+            when = min(when, task.deadline)
+        self._schedule(task, when)
+
+
+DEFAULT_SCHEDULER = PollingScheduler()
@@ -0,0 +1,226 @@
+import gzip, io, json, random, time
+from email.utils import parsedate_tz, mktime_tz
+from requests import Session, exceptions
+from requests.adapters import HTTPAdapter
+from .utils import DataikuException
+
+def new_session(pool_connections=10, pool_maxsize=10, pool_block=False, keep_alive=True):
+    """
+    Create a HTTP session with a tuned connection pool.
+
+    The returned session does not carry any authentication, so it can be shared between several
+    :class:`dataikuapi.dssclient.DSSClient` and :class:`dataikuapi.apinode_client.APINodeClient`
+    instances (pass it as their ``session`` argument) in order to reuse warm connections.
+
+    :param int pool_connections: number of per-host connection pools to keep
+    :param int pool_maxsize: maximum number of connections kept alive for each host. Set it to at least
+        the number of threads that use the session concurrently
+    :param bool pool_block: if True, requests wait for a free connection when all connections of a host
+        are in use, instead of opening a throw-away connection
+    :param bool keep_alive: if False, connections are closed after each request
+
+    :return: a :class:`requests.Session`
+    """
+    session = Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if not keep_alive:
+        session.headers.update({"Connection" : "close"})
+    return session
+
+
+class JSONCodec(object):
+    """
+    Encodes request bodies to JSON and decodes JSON responses.
+
+    Do not create this class directly, use :func:`get_json_codec`
+    """
+    def __init__(self, name, dumps, loads):
+        self.name = name
+        self._dumps = dumps
+        self._loads = loads
+
+    def dumps(self, obj):
+        try:
+            return self._dumps(obj)
+        except TypeError:
+            # Faster libraries are stricter on the types they accept
+            return json.dumps(obj)
+
+    def loads(self, text):
+        # Decode bytes first, like Response.json() does: given bytes, some libraries (simplejson) return
+        # str instead of unicode for ASCII strings
+        if isinstance(text, str):
+            text = text.decode("utf-8")
+        return self._loads(text)
+
+    def __repr__(self):
+        return "JSONCodec(%s)" % self.name
+
+
+def _make_orjson_codec():
+    import orjson
+    return JSONCodec("orjson", lambda obj: orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS), orjson.loads)
+
+def _make_rapidjson_codec():
+    import rapidjson
+    return JSONCodec("rapidjson", rapidjson.dumps, rapidjson.loads)
+
+def _make_simplejson_codec():
+    import simplejson
+    return JSONCodec("simplejson", simplejson.dumps, simplejson.loads)
+
+def _make_json_codec():
+    return JSONCodec("json", json.dumps, json.loads)
+
+JSON_CODECS = [
+    ("orjson", _make_orjson_codec),
+    ("rapidjson", _make_rapidjson_codec),
+    ("simplejson", _make_simplejson_codec),
+    ("json", _make_json_codec)
+]
+
+def get_json_codec(name=None):
+    """
+    Get a JSON codec backed by the given library: one of "orjson", "rapidjson", "simplejson" or "json"
+    (the standard library). By default, the fastest installed library is used.
+
+    Whatever the library, codecs decode JSON strings to unicode, like requests' Response.json().
+    """
+    for (codec_name, make_codec) in JSON_CODECS:
+        if name is None or name == codec_name:
+            try:
+                return make_codec()
+            except ImportError:
+                if name is not None:
+                    raise
+    raise ValueError("Unknown JSON codec %s, expected one of %s" % (name, ", ".join(n for (n, m) in JSON_CODECS)))
+
+
+class RetryPolicy(object):
+    """
+    A policy to retry HTTP calls that failed because of transient errors (connection resets, timeouts,
+    502/503/504 answers).
+
+    Waits between attempts grow exponentially and are randomized ("full jitter") so that many clients
+    failing at the same time do not retry in lockstep. When the server sends a Retry-After header, it is
+    used instead of the computed wait.
+
+    :param int max_retries: maximum number of retries for a single call
+    :param float backoff_factor: base wait, in seconds. The wait before retry n is drawn between 0 and
+        backoff_factor * 2^n
+    :param float max_backoff: maximum wait between two attempts, in seconds
+    :param float total_timeout: maximum time spent on a call including all its retries, in seconds. No
+        retry is attempted if it would exceed this budget. None for no limit
+    :param retry_statuses: HTTP statuses considered transient
+    :param bool retry_post: whether to also retry POST calls, which are not idempotent in general
+    """
+    IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+    def __init__(self, max_retries=3, backoff_factor=0.5, max_backoff=30, total_timeout=120,
+                 retry_statuses=(502, 503, 504), retry_post=False):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.total_timeout = total_timeout
+        self.retry_statuses = retry_statuses
+        self.retry_post = retry_post
+
+    def is_retryable_method(self, method):
+        method = method.upper()
+        return method in self.IDEMPOTENT_METHODS or (self.retry_post and method == "POST")
+
+    def get_backoff(self, attempt, response=None):
+        """
+        Get the wait before the retry following the given (0-based) attempt, in seconds
+        """
+        if response is not None:
+            retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return min(retry_after, self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * (2 ** attempt)))
+
+    def next_delay(self, method, attempt, start_time, response=None):
+        """
+        Get the wait before retrying a failed attempt, or None if the call should not be retried.
+        response is None when the attempt failed without a HTTP answer.
+        """
+        if response is not None and response.status_code not in self.retry_statuses:
+            return None
+        if attempt >= self.max_retries or not self.is_retryable_method(method):
+            return None
+        delay = self.get_backoff(attempt, response)
+        if self.total_timeout is not None and time.time() - start_time + delay > self.total_timeout:
+            return None
+        return delay
+
+
+def _parse_retry_after(value):
+    if value is None:
+        return None
+    try:
+        return max(0, float(value))
+    except ValueError:
+        date = parsedate_tz(value)
+        if date is None:
+            return None
+        return max(0, mktime_tz(date) - time.time())
+
+
+def send_with_retries(retry_policy, method, send, replayable=True):
+    """
+    Call send() to perform a HTTP call, and retry it according to retry_policy.
+
+    replayable must be False when the body of the call is a stream, which can only be sent once.
+    """
+    if retry_policy is None or not replayable:
+        return send()
+    start_time = time.time()
+    attempt = 0
+    while True:
+        try:
+            response = send()
+        except (exceptions.ConnectionError, exceptions.Timeout):
+            delay = retry_policy.next_delay(method, attempt, start_time)
+            if delay is None:
+                raise
+        else:
+            delay = retry_policy.next_delay(method, attempt, start_time, response)
+            if delay is None:
+                return response
+            response.close()
+        time.sleep(delay)
+        attempt += 1
+
+
+def check_response(http_res):
+    """
+    Return http_res if it is successful, raise a :class:`dataikuapi.utils.DataikuException` describing
+    the error sent by the server otherwise
+    """
+    try:
+        http_res.raise_for_status()
+    except exceptions.HTTPError:
+        try:
+            ex = http_res.json()
+        except ValueError:
+            ex = {"message": http_res.text}
+        raise DataikuException("%s: %s" % (ex.get("errorType", "Unknown error"), ex.get("message", "No message")))
+    return http_res
+
+
+def compress_body(data, headers, min_size=1024):
+    """
+    Gzip-compress a request body of at least min_size bytes.
+
+    :return: a (body, headers) tuple, headers being a copy of the given headers with a Content-Encoding if the body was compressed
+    """
+    if data is None or len(data) < min_size:
+        return (data, headers)
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode="wb") as f:
+        f.write(data)
+    headers = dict(headers)
+    headers["Content-Encoding"] = "gzip"
+    return (buf.getvalue(), headers)
@@ -1,6 +1,10 @@
-import csv
+import copy, csv, json, keyword, os, re, sys, threading, time
+from Queue import Queue, Empty, Full
+from collections import OrderedDict
+from datetime import datetime
 from dateutil import parser as date_iso_parser
-from itertools import izip_longest
+from dateutil.tz import tzutc
+from itertools import izip, izip_longest, islice
 from contextlib import closing
 
 
@@ -23,6 +27,49 @@ class DataikuUTF8CSVReader(object):
     def __iter__(self):
         return self
         
+class ExpiringLRUCache(object):
+    """
+    A thread-safe cache keeping at most max_size entries, each for at most ttl seconds.
+    The least recently used entries are evicted first. A ttl of 0 disables the cache.
+    """
+    def __init__(self, max_size=1000, ttl=60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Get the value cached for key, or None if it is missing or expired
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None or entry[0] < time.time():
+                return None
+            self._entries[key] = entry
+            return entry[1]
+
+    def put(self, key, value):
+        """
+        Cache a deep copy of value for key, so that the caller can keep modifying value
+        """
+        if self.ttl <= 0:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.time() + self.ttl, value)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
 def none_if_throws(f):
     def aux(*args, **kargs):
         try:
@@ -32,47 +79,741 @@ def none_if_throws(f):
     return aux
 
 
+def _decode_utf8(s):
+    try:
+        return unicode(s, "utf8")
+    except (TypeError, UnicodeDecodeError):
+        return None
+
+def _parse_int(s):
+    if not s:
+        return None
+    try:
+        return int(s)
+    except ValueError:
+        return None
+
+def _parse_float(s):
+    if not s:
+        return None
+    try:
+        return float(s)
+    except ValueError:
+        return None
+
+def _parse_any_date(s):
+    try:
+        return date_iso_parser.parse(s)
+    except (ValueError, OverflowError):
+        return None
+
+_UTC = tzutc()
+
+def parse_iso_date(s):
+    """
+    Parse a date as written by DSS (2017-01-31T23:59:59.999Z), falling back to a generic parser for other layouts
+    """
+    if not s:
+        return None
+    if len(s) == 24 and s[4] == "-" and s[7] == "-" and s[10] == "T" and s[13] == ":" \
+            and s[16] == ":" and s[19] == "." and s[23] == "Z":
+        try:
+            return datetime(int(s[0:4]), int(s[5:7]), int(s[8:10]), int(s[11:13]), int(s[14:16]),
+                            int(s[17:19]), int(s[20:23]) * 1000, _UTC)
+        except ValueError:
+            pass
+    return _parse_any_date(s)
+
+def make_date_parser(cache_size=1024):
+    """
+    Build a date parser for one column, which keeps the most recently parsed values. Date columns
+    often repeat the same values (days, hours), which then do not need to be parsed again.
+    """
+    cache = {}
+
+    def parse(s):
+        try:
+            return cache[s]
+        except KeyError:
+            pass
+        if len(cache) >= cache_size:
+            cache.clear()
+        value = cache[s] = parse_iso_date(s)
+        return value
+    return parse
+
+def _get_caster(col_type):
+    if col_type == "date":
+        return make_date_parser()
+    return CASTERS.get(col_type, _decode_utf8)
+
+def str_to_bool(s):
+    if s is None:
+        return False
+    return s.lower() == "true"
+
+# Casters never raise: unparseable and empty values are cast to None
+CASTERS = {
+    "tinyint" : _parse_int,
+    "smallint" : _parse_int,
+    "int": _parse_int,
+    "bigint": _parse_int,
+    "float": _parse_float,
+    "double": _parse_float,
+    "date": parse_iso_date,
+    "boolean": str_to_bool,
+}
+
+INT_TYPES = ("tinyint", "smallint", "int", "bigint")
+FLOAT_TYPES = ("float", "double")
+
+ROW_TYPES = ("list", "tuple", "record", "buffer")
+
+def make_row_decoder(schema, row_type="list"):
+    """
+    Build a function casting the raw string values of a row to the types of the given schema columns.
+
+    The decoded rows are:
+      * with row_type "list", new lists. Values of rows shorter than the schema are cast from None,
+        values beyond the schema are None
+      * with row_type "tuple", new tuples
+      * with row_type "record", instances of a record class generated for the schema by :func:`make_record_class`
+      * with row_type "buffer", always the same list, overwritten by each row. Callers must copy the
+        values they want to keep before decoding the next row
+
+    With row types other than "list", values beyond the schema are dropped.
+    """
+    if row_type not in ROW_TYPES:
+        raise ValueError("Unknown row type %s, expected one of %s" % (row_type, ", ".join(ROW_TYPES)))
+    casters = [_get_caster(col["type"]) for col in schema]
+    width = len(casters)
+
+    if row_type == "list":
+        def decode_row(row):
+            if len(row) == width:
+                return [caster(val) for (caster, val) in izip(casters, row)]
+            return [caster(val) if caster is not None else None
+                    for (caster, val) in izip_longest(casters, row)]
+        return decode_row
+
+    padding = [None] * width
+    if row_type == "buffer":
+        buf = [None] * width
+        def decode_row(row):
+            if len(row) != width:
+                row = (row + padding)[:width]
+            buf[:] = [caster(val) for (caster, val) in izip(casters, row)]
+            return buf
+        return decode_row
+
+    make_row = tuple if row_type == "tuple" else make_record_class(schema)._make
+    def decode_row(row):
+        if len(row) != width:
+            row = (row + padding)[:width]
+        return make_row([caster(val) for (caster, val) in izip(casters, row)])
+    return decode_row
+
+
+class DataikuRecord(object):
+    """
+    Base class of the record classes generated by :func:`make_record_class`
+    """
+    __slots__ = ()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [getattr(self, name) for name in self._fields[index]]
+        return getattr(self, self._fields[index])
+
+    def __iter__(self):
+        for name in self._fields:
+            yield getattr(self, name)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __eq__(self, other):
+        return isinstance(other, DataikuRecord) and list(self) == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return "%s(%s)" % (self.__class__.__name__,
+                           ", ".join("%s=%r" % (name, getattr(self, name)) for name in self._fields))
+
+# Not keywords in Python 2, but they cannot be assigned to either
+_RESERVED_NAMES = ("None", "True", "False")
+
+def make_record_class(schema, class_name="Record"):
+    """
+    Generate a class with __slots__ for the rows of the given schema. Values can be accessed by
+    attribute (column names are turned into valid identifiers: "my col" becomes my_col, duplicates get
+    a numeric suffix), by index, or by iterating.
+    """
+    fields = []
+    for (i, col) in enumerate(schema):
+        name = re.sub(r"\W", "_", col["name"].encode("ascii", "replace") if isinstance(col["name"], unicode) else col["name"])
+        if name == "" or name[0].isdigit() or name.startswith("_") or keyword.iskeyword(name) or name in _RESERVED_NAMES:
+            name = "f_" + name
+        while name in fields:
+            name = "%s_%d" % (name, i)
+        fields.append(name)
+    width = len(fields)
+
+    def __init__(self, *values):
+        if len(values) != width:
+            raise TypeError("%s takes %d values (%d given)" % (class_name, width, len(values)))
+        for (name, value) in izip(fields, values):
+            setattr(self, name, value)
+
+    @classmethod
+    def _make(cls, values):
+        return cls(*values)
+    return type(class_name, (DataikuRecord,), {
+        "__slots__" : tuple(fields),
+        "_fields" : tuple(fields),
+        "__init__" : __init__,
+        "_make" : _make
+    })
+
+
+def polling_intervals(initial_interval=0.05, max_interval=5, backoff=1.5):
+    """
+    Generate the waits, in seconds, between successive polls of a long-running operation: short at first so
+    that quick operations are noticed quickly, then growing geometrically by backoff up to max_interval
+    """
+    interval = initial_interval
+    while True:
+        yield interval
+        interval = min(max_interval, interval * backoff)
+
+
+def poll_until(poll, is_done, timeout=None, initial_interval=0.05, max_interval=5, backoff=1.5, description="operation"):
+    """
+    Call poll() with adaptive waits (see :func:`polling_intervals`) until is_done(result) is true, and return
+    the last result. Raises a :class:`DataikuException` if timeout seconds elapse first
+    """
+    deadline = None if timeout is None else time.time() + timeout
+    for interval in polling_intervals(initial_interval, max_interval, backoff):
+        result = poll()
+        if is_done(result):
+            return result
+        wait_for_next_poll(interval, deadline, timeout, description)
+
+
+def wait_for_next_poll(interval, deadline=None, timeout=None, description="operation"):
+    """
+    Sleep interval seconds, or until deadline (a time.time() value, or None for no deadline) if it comes first.
+    Raises a :class:`DataikuException` if the deadline has passed, timeout being the delay it was set with
+    """
+    if deadline is not None:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            raise DataikuException("Timed out after %ss waiting for %s" % (timeout, description))
+        interval = min(interval, remaining)
+    time.sleep(interval)
+
+
+class PrefetchedLineStream(object):
+    """
+    Reads a raw stream in a background thread, so that network reads overlap with the consumer's work.
+
+    At most max_chunks chunks of chunk_size bytes are read ahead of the consumer. Iterating yields the
+    lines of the stream. close() must be called when the consumer stops early, to stop the thread.
+    """
+    _EOF = object()
+
+    def __init__(self, raw, chunk_size=65536, max_chunks=16):
+        if hasattr(raw, "decode_content"):
+            # Unlike iterating over a urllib3 response, read() returns the bytes as sent unless told
+            # to decompress them (the server compresses them when the client accepts gzip)
+            raw.decode_content = True
+        self.raw = raw
+        self.chunk_size = chunk_size
+        self._chunks = Queue(max_chunks)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._read)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _put(self, item):
+        while not self._stopped.is_set():
+            try:
+                self._chunks.put(item, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+
+    def _read(self):
+        try:
+            while True:
+                chunk = self.raw.read(self.chunk_size)
+                if not chunk:
+                    break
+                if not self._put(chunk):
+                    return
+            self._put(self._EOF)
+        except Exception:
+            self._put(sys.exc_info())
+
+    def iter_chunks(self):
+        """
+        Iterate over the chunks of bytes read from the stream
+        """
+        while True:
+            try:
+                # Get with a timeout so that the consumer stays interruptible
+                chunk = self._chunks.get(timeout=0.1)
+            except Empty:
+                continue
+            if chunk is self._EOF:
+                return
+            if isinstance(chunk, tuple):
+                raise chunk[0], chunk[1], chunk[2]
+            yield chunk
+
+    def __iter__(self):
+        pending = ""
+        for chunk in self.iter_chunks():
+            lines = (pending + chunk).split("\n")
+            pending = lines.pop()
+            for line in lines:
+                yield line + "\n"
+        if pending:
+            yield pending
+
+    def close(self):
+        self._stopped.set()
+
+
+class _IterableFile(object):
+    """
+    A file-like object reading from an iterable of byte strings
+    """
+    def __init__(self, iterable):
+        self._iterator = iter(iterable)
+        self._pending = ""
+
+    def read(self, size=-1):
+        chunks = [self._pending]
+        length = len(self._pending)
+        while size < 0 or length < size:
+            try:
+                chunk = next(self._iterator)
+            except StopIteration:
+                break
+            chunks.append(chunk)
+            length += len(chunk)
+        data = "".join(chunks)
+        if size < 0:
+            self._pending = ""
+            return data
+        self._pending = data[size:]
+        return data[:size]
+
+    def __iter__(self):
+        return iter(lambda: self.read(65536), "")
+
+
+_JSON_STRUCTURE = re.compile(r'["\[\]{},:]')
+_JSON_ITEM_STRUCTURE = re.compile(r'["\[\]{},]')
+_JSON_STRING_END = re.compile(r'["\\]')
+
+def iter_json_array(chunks, key=None, loads=json.loads):
+    """
+    Incrementally parse a JSON array and yield its items one at a time, so that only one item at a time
+    is held in memory.
+
+    Args:
+        chunks: an iterable over the bytes of the JSON document, like a streamed response's iter_content()
+        key: (optional) if given, the document is an object and the array is its value for this top-level key.
+            Nothing is yielded if the key is missing. Otherwise the document must be the array itself
+        loads: the function decoding the JSON text of each item
+    """
+    buf = ""
+    pos = 0
+    depth = 0
+    in_string = False
+    # Depth of the items of the array, once its opening bracket is found
+    array_depth = None
+    item_start = None
+    # Keyed mode: the last top-level string, and whether a ':' followed it
+    string_start = None
+    last_string = None
+    after_colon = False
+
+    for chunk in chunks:
+        if not chunk:
+            continue
+        keep = item_start if item_start is not None else (string_start if string_start is not None else pos)
+        buf = buf[keep:] + chunk
+        pos -= keep
+        if item_start is not None:
+            item_start -= keep
+        if string_start is not None:
+            string_start -= keep
+
+        while True:
+            if in_string:
+                m = _JSON_STRING_END.search(buf, pos)
+                if m is None:
+                    pos = len(buf)
+                    break
+                if m.group() == "\\":
+                    if m.end() >= len(buf):
+                        # The escaped character is in the next chunk
+                        pos = m.start()
+                        break
+                    pos = m.end() + 1
+                    continue
+                pos = m.end()
+                in_string = False
+                if string_start is not None:
+                    last_string = json.loads(buf[string_start:pos])
+                    string_start = None
+                continue
+
+            m = (_JSON_STRUCTURE if array_depth is None else _JSON_ITEM_STRUCTURE).search(buf, pos)
+            if m is None:
+                pos = len(buf)
+                break
+            c = m.group()
+            pos = m.end()
+            if c == '"':
+                in_string = True
+                if array_depth is None and depth == 1:
+                    string_start = m.start()
+            elif c == "{" or c == "[":
+                depth += 1
+                if array_depth is None:
+                    if depth == 1 and key is None:
+                        if c != "[":
+                            raise ValueError("Expected a JSON array")
+                        array_depth = 1
+                        item_start = pos
+                    elif depth == 2 and key is not None and c == "[" and after_colon and last_string == key:
+                        array_depth = 2
+                        item_start = pos
+            elif c == ":":
+                if depth == 1:
+                    after_colon = True
+            else:
+                if depth == array_depth:
+                    text = buf[item_start:m.start()].strip()
+                    if text:
+                        yield loads(text)
+                    elif c == ",":
+                        raise ValueError("Unexpected ',' in JSON array")
+                    if c != ",":
+                        return
+                    item_start = pos
+                elif c != ",":
+                    depth -= 1
+                    if depth == 0:
+                        # End of the document, the key was not found
+                        return
+                elif depth == 1:
+                    after_colon = False
+                    last_string = None
+
+    raise ValueError("Truncated JSON document")
+
+
+def get_column_indices(schema, columns):
+    """
+    Get the indices in schema of the given column names. Raises a ValueError if some are not in schema
+    """
+    indices = dict((col["name"], i) for (i, col) in enumerate(schema))
+    unknown = [name for name in columns if name not in indices]
+    if len(unknown) > 0:
+        raise ValueError("Unknown columns: %s" % ", ".join(unknown))
+    return [indices[name] for name in columns]
+
+
 class DataikuStreamedHttpUTF8CSVReader(object):
     """
     A CSV reader with a schema
+
+    When columns (a list of column names) is given, only these columns are decoded and returned, in
+    the given order. When limit is given, at most limit rows are read before closing the stream.
+    When prefetch is True, the stream is read by a background thread while rows are decoded.
     """
-    def __init__(self, schema, csv_stream):
-        self.schema = schema
+    def __init__(self, schema, csv_stream, columns=None, limit=None, prefetch=False):
         self.csv_stream = csv_stream
+        self.limit = limit
+        self.prefetch = prefetch
+        self.stream_width = len(schema)
+        if columns is None:
+            self.schema = schema
+            self.column_indices = None
+        else:
+            self.column_indices = get_column_indices(schema, columns)
+            self.schema = [schema[i] for i in self.column_indices]
+            if self.column_indices == range(self.stream_width):
+                self.column_indices = None
 
-    def iter_rows(self):
-        def decode(x):
-            return unicode(x, "utf8")
+    def _iter_raw_rows(self):
+        """
+        Iterate over the raw rows, restricted to the selected columns and the row limit
+        """
+        with closing(self.csv_stream) as r:
+            source = PrefetchedLineStream(r.raw) if self.prefetch else r.raw
+            try:
+                raw_rows = csv.reader(source,
+                                      delimiter='\t',
+                                      quotechar='"',
+                                      doublequote=True)
+                if self.limit is not None:
+                    raw_rows = islice(raw_rows, self.limit)
+                if self.column_indices is None:
+                    for raw_row in raw_rows:
+                        yield raw_row
+                else:
+                    indices = self.column_indices
+                    padding = [None] * self.stream_width
+                    for raw_row in raw_rows:
+                        if len(raw_row) < self.stream_width:
+                            raw_row = raw_row + padding
+                        yield [raw_row[i] for i in indices]
+            finally:
+                if self.prefetch:
+                    source.close()
 
-        def parse_iso_date(s):
-            if s == "":
-                return None
-            else:
-                return date_iso_parser.parse(s)
-
-        def str_to_bool(s):
-            if s is None:
-                return False
-            return s.lower() == "true"
-
-        CASTERS = {
-            "tinyint" : int,
-            "smallint" : int,
-            "int": int,
-            "bigint": int,
-            "float": float,
-            "double": float,
-            "date": parse_iso_date,
-            "boolean": str_to_bool,
-        }
-        schema = self.schema
-        casters = [
-            CASTERS.get(col["type"], decode) for col in schema
-        ]
+    def iter_rows(self, row_type="list"):
+        """
+        Iterate over the rows, see :func:`make_row_decoder` for the available row types
+        """
+        decode_row = make_row_decoder(self.schema, row_type)
+        for uncasted_tuple in self._iter_raw_rows():
+            yield decode_row(uncasted_tuple)
+
+    def _iter_frames(self, batch_size):
+        """
+        Parse the stream with pandas' C parser, into DataFrames of at most batch_size rows of the selected
+        columns. Columns are not converted yet: missing values are NaN, other values are UTF-8 byte strings
+        """
+        import pandas as pd
+
+        indices = self.column_indices if self.column_indices is not None else range(self.stream_width)
         with closing(self.csv_stream) as r:
-            for uncasted_tuple in csv.reader(r.raw,
-                                         delimiter='\t',
-                                         quotechar='"',
-                                         doublequote=True):
-                yield [none_if_throws(caster)(val)
-                       for (caster, val) in izip_longest(casters, uncasted_tuple)]
+            prefetched = PrefetchedLineStream(r.raw) if self.prefetch else None
+            try:
+                if prefetched is not None:
+                    source = _IterableFile(prefetched.iter_chunks())
+                elif hasattr(r.raw, "read"):
+                    if hasattr(r.raw, "decode_content"):
+                        r.raw.decode_content = True
+                    source = r.raw
+                else:
+                    source = _IterableFile(r.raw)
+                frames = pd.read_csv(source, sep="\t", quotechar='"', doublequote=True,
+                                     header=None, names=range(self.stream_width), usecols=indices, index_col=False,
+                                     # Only empty values are missing, and only outside of string columns
+                                     dtype=object, keep_default_na=False,
+                                     na_values=dict((i, [""]) for (i, col) in izip(indices, self.schema)
+                                                    if col["type"] in CASTERS),
+                                     nrows=self.limit, chunksize=batch_size, engine="c")
+                for frame in frames:
+                    yield [frame[i].values for i in indices]
+            except pd.errors.EmptyDataError:
+                return
+            finally:
+                if prefetched is not None:
+                    prefetched.close()
+
+    def iter_batches(self, batch_size=10000):
+        """
+        Iterate over the data by batches of columns. Requires numpy and pandas.
+
+        Each batch is an ordered dict of column name to numpy array. The type of a column is the same in all
+        the batches, whatever its values:
+
+        * integer columns are numpy.ma.MaskedArray of int64, masked where values are missing, invalid or
+          out of the int64 range
+        * boolean columns are numpy.ma.MaskedArray of bool, masked where values are missing
+        * floating point columns are float64, with NaN for missing values
+        * date columns are datetime64[ns] in UTC, with NaT for missing values
+        * other columns are arrays of unicode objects, with None for missing values
+        """
+        import numpy as np
+
+        for columns in self._iter_frames(batch_size):
+            batch = OrderedDict()
+            for (col, values) in izip(self.schema, columns):
+                batch[col["name"]] = _to_column_array(np, col["type"], values)
+            yield batch
+
+    def iter_arrow_batches(self, batch_size=10000):
+        """
+        Iterate over the data as Arrow record batches, all having the schema returned by
+        :func:`arrow_schema`. Requires pyarrow, numpy and pandas.
+
+        Dates are truncated to milliseconds, and integer values out of the range of the column type are missing
+        """
+        import numpy as np
+        import pyarrow as pa
+
+        schema = arrow_schema(self.schema)
+        for batch in self.iter_batches(batch_size):
+            arrays = [_to_arrow_array(np, pa, col["type"], field.type, values)
+                      for (col, field, values) in izip(self.schema, schema, batch.itervalues())]
+            yield pa.RecordBatch.from_arrays(arrays, schema.names)
+
+    def write_parquet(self, path, batch_size=10000, compression="snappy"):
+        """
+        Write the data to a Parquet file, one row group per batch. Requires pyarrow, numpy and pandas.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = pq.ParquetWriter(path, arrow_schema(self.schema), compression=compression)
+        try:
+            for batch in self.iter_arrow_batches(batch_size):
+                writer.write_table(pa.Table.from_batches([batch]))
+        except:
+            # Do not leave a truncated file behind
+            writer.close()
+            os.remove(path)
+            raise
+        writer.close()
+
+    def write_arrow_ipc(self, path, batch_size=10000):
+        """
+        Write the data to an Arrow IPC file, one record batch per batch. Requires pyarrow, numpy and pandas.
+
+        Read it back with pyarrow.ipc.open_file. This is also the format of Feather version 2 files, which
+        pyarrow 0.17 and later read as Feather, but older versions only read Feather version 1 files.
+        """
+        import pyarrow as pa
+
+        try:
+            with pa.OSFile(path, "wb") as sink:
+                writer = pa.RecordBatchFileWriter(sink, arrow_schema(self.schema))
+                try:
+                    for batch in self.iter_arrow_batches(batch_size):
+                        writer.write_batch(batch)
+                finally:
+                    writer.close()
+        except:
+            # Do not leave a truncated file behind
+            os.remove(path)
+            raise
+
+    def to_dataframe(self, batch_size=10000):
+        """
+        Read all the data in a pandas DataFrame. Requires numpy and pandas.
+
+        Column types are the same as for :meth:`iter_batches`, except for integer columns, which use pandas'
+        nullable Int64 type, and boolean columns, which are object columns with None for missing values
+        when there are any. With pandas older than 0.24, integer columns with missing values are object
+        columns too.
+        """
+        import numpy as np
+        import pandas as pd
+
+        names = [col["name"] for col in self.schema]
+        columns = [[] for col in self.schema]
+        for batch in self.iter_batches(batch_size):
+            for (column, values) in izip(columns, batch.itervalues()):
+                column.append(values)
+        data = OrderedDict()
+        for (col, name, column) in izip(self.schema, names, columns):
+            if len(column) == 0:
+                values = _to_column_array(np, col["type"], np.empty(0, dtype=object))
+            elif isinstance(column[0], np.ma.MaskedArray):
+                values = np.ma.concatenate(column)
+            else:
+                values = np.concatenate(column)
+            data[name] = _to_series(np, pd, col["type"], values)
+        # Passing columns would make pandas reindex, which is slow for date columns
+        return pd.DataFrame(data)
+
+
+def arrow_schema(schema):
+    """
+    Build the pyarrow schema matching a list of DSS schema columns. Requires pyarrow.
+    """
+    import pyarrow as pa
+
+    types = {
+        "tinyint" : pa.int8(),
+        "smallint" : pa.int16(),
+        "int" : pa.int32(),
+        "bigint" : pa.int64(),
+        "float" : pa.float32(),
+        "double" : pa.float64(),
+        "boolean" : pa.bool_(),
+        "date" : pa.timestamp("ms", tz="UTC"),
+    }
+    return pa.schema([pa.field(col["name"], types.get(col["type"], pa.string())) for col in schema])
+
+def _to_column_array(np, col_type, values):
+    """
+    Convert an object array of UTF-8 byte strings (NaN for missing values) to the numpy type of the column
+    """
+    import pandas as pd
+
+    missing = pd.isnull(values)
+    if col_type in INT_TYPES or col_type in FLOAT_TYPES:
+        dtype = np.int64 if col_type in INT_TYPES else np.float64
+        filled = values.copy()
+        filled[missing] = "0"
+        try:
+            data = filled.astype(dtype)
+        except (ValueError, OverflowError):
+            # Invalid values are missing, like in iter_rows, and so are integers that do not fit in an int64
+            caster = _parse_int if col_type in INT_TYPES else _parse_float
+            parsed = [caster(v) for v in filled]
+            if col_type in INT_TYPES:
+                bounds = np.iinfo(np.int64)
+                parsed = [v if v is not None and bounds.min <= v <= bounds.max else None for v in parsed]
+            missing = missing | np.array([v is None for v in parsed], dtype=np.bool_)
+            data = np.array([0 if v is None else v for v in parsed], dtype=dtype)
+        if col_type in INT_TYPES:
+            return np.ma.MaskedArray(data, mask=missing)
+        data[missing] = np.nan
+        return data
+    elif col_type == "boolean":
+        data = np.array([not m and v.lower() == "true" for (v, m) in izip(values, missing)], dtype=np.bool_)
+        return np.ma.MaskedArray(data, mask=missing)
+    elif col_type == "date":
+        # The values of a UTC DatetimeIndex are naive UTC datetime64[ns]
+        return pd.to_datetime(values, utc=True, errors="coerce").values
+    else:
+        decoded = np.empty(len(values), dtype=object)
+        decoded[:] = [None if m else _decode_utf8(v) for (v, m) in izip(values, missing)]
+        return decoded
+
+def _to_arrow_array(np, pa, col_type, arrow_type, values):
+    """
+    Convert a column array of :meth:`DataikuStreamedHttpUTF8CSVReader.iter_batches` to the Arrow type of
+    the column. Integer values out of the range of the Arrow type are invalid, and thus missing
+    """
+    if col_type in INT_TYPES:
+        missing = np.ma.getmaskarray(values)
+        bounds = np.iinfo(arrow_type.to_pandas_dtype())
+        missing = missing | (values.data < bounds.min) | (values.data > bounds.max)
+        return pa.array(np.where(missing, 0, values.data), mask=missing, type=arrow_type)
+    elif col_type == "boolean":
+        return pa.array(values.data, mask=np.ma.getmaskarray(values), type=arrow_type)
+    elif col_type == "float":
+        with np.errstate(over="ignore"):
+            return pa.array(values.astype(np.float32), type=arrow_type, from_pandas=True)
+    elif col_type == "date":
+        # Arrow refuses to drop the sub-millisecond digits of the values by itself
+        return pa.array(values.astype("datetime64[ms]"), type=arrow_type, from_pandas=True)
+    return pa.array(values, type=arrow_type, from_pandas=True)
+
+def _to_series(np, pd, col_type, values):
+    if isinstance(values, np.ma.MaskedArray):
+        missing = np.ma.getmaskarray(values)
+        if col_type in INT_TYPES and hasattr(pd, "arrays"):
+            return pd.Series(pd.arrays.IntegerArray(values.data, missing))
+        if not missing.any():
+            return pd.Series(values.data)
+        objects = values.data.astype(object)
+        objects[missing] = None
+        return pd.Series(objects)
+    return pd.Series(values)
@@ -0,0 +1,42 @@
+from dataikuapi.bulk import map_concurrent, iter_concurrent, DSSBulkExecutor
+from nose.tools import ok_
+from nose.tools import eq_
+from nose.tools import raises
+
+# Tests of the concurrent calls, which do not need a DSS instance
+
+def map_concurrent_test():
+	results = map_concurrent(lambda x: 10 / x, [5, 0, 2], max_workers=2)
+	eq_([2, 5], [results[0].get(), results[2].get()])
+	ok_(not results[1].is_success())
+	ok_(isinstance(results[1].get_error(), ZeroDivisionError))
+
+def map_concurrent_more_workers_than_items_test():
+	eq_([1], [result.get() for result in map_concurrent(lambda x: x, [1], max_workers=10)])
+
+def iter_concurrent_test():
+	items = list(iter_concurrent(["a", "b", "c"], lambda key: [key] * 3, max_workers=2, preserve_order=True))
+	eq_([(key, key) for key in ["a", "b", "c"] for i in range(3)], items)
+
+def iter_concurrent_unordered_test():
+	items = list(iter_concurrent(["a", "b", "c"], lambda key: range(5), max_workers=2))
+	eq_(sorted((key, i) for key in ["a", "b", "c"] for i in range(5)), sorted(items))
+
+def bulk_executor_test():
+	executor = DSSBulkExecutor(max_workers=2)
+	eq_(0, executor.submit(lambda x, y=0: x + y, 1, y=2))
+	eq_(1, executor.submit(lambda: 4))
+	eq_([3, 4], [result.get() for result in executor.execute()])
+	eq_([], executor.execute())
+
+@raises(ValueError)
+def map_concurrent_no_workers_test():
+	map_concurrent(lambda x: x, [1, 2], max_workers=0)
+
+@raises(ValueError)
+def iter_concurrent_no_workers_test():
+	iter_concurrent(["a"], lambda key: [key], max_workers=0)
+
+@raises(ValueError)
+def bulk_executor_no_workers_test():
+	DSSBulkExecutor(max_workers=-1)
@@ -0,0 +1,95 @@
+from dataikuapi.dss.dataset import DSSDataset
+from dataikuapi.utils import ExpiringLRUCache
+import json, os, shutil, tempfile
+from nose.plugins.skip import SkipTest
+from nose.tools import ok_
+from nose.tools import eq_
+
+# Tests of the dataset reads against a fake DSS instance
+
+SCHEMA = [{"name" : "id", "type" : "bigint"}, {"name" : "name", "type" : "string"},
+		  {"name" : "a,b", "type" : "string"}, {"name" : "score", "type" : "double"}]
+
+ROWS = [["1", "x", "p", "0.5"], ["2", "y", "q", "1.5"]]
+
+class FakeStream(object):
+	def __init__(self, lines):
+		self.raw = iter(lines)
+		self.closed = False
+
+	def close(self):
+		self.closed = True
+
+class FakeClient(object):
+	"""
+	Answers the schema and data calls of a dataset. The data endpoint sends the requested columns only,
+	in the dataset's order
+	"""
+	def __init__(self):
+		self._schema_cache = ExpiringLRUCache()
+		self.streams = []
+		self.data_params = []
+
+	def _perform_json(self, method, path, params=None, body=None):
+		if path.endswith("/schema"):
+			return {"columns" : SCHEMA}
+		raise Exception("Unexpected call %s %s" % (method, path))
+
+	def _perform_raw(self, method, path, params=None, body=None):
+		self.data_params.append(params)
+		indices = range(len(SCHEMA))
+		if params.get("columns") is not None:
+			names = params["columns"].split(",")
+			indices = [i for (i, col) in enumerate(SCHEMA) if col["name"] in names]
+		stream = FakeStream(["\t".join(row[i] for i in indices) + "\n" for row in ROWS])
+		self.streams.append(stream)
+		return stream
+
+def all_columns_test():
+	client = FakeClient()
+	eq_([[1, u"x", u"p", 0.5], [2, u"y", u"q", 1.5]], list(DSSDataset(client, "P", "d").iter_rows()))
+	eq_(None, client.data_params[0]["columns"])
+	ok_(client.streams[0].closed)
+
+def columns_sent_in_schema_order_test():
+	client = FakeClient()
+	eq_([[0.5, 1], [1.5, 2]], list(DSSDataset(client, "P", "d").iter_rows(columns=["score", "id"])))
+	eq_("id,score", client.data_params[0]["columns"])
+	ok_(client.streams[0].closed)
+
+def duplicate_columns_test():
+	client = FakeClient()
+	eq_([[u"x", u"x"], [u"y", u"y"]], list(DSSDataset(client, "P", "d").iter_rows(columns=["name", "name"])))
+	eq_("name", client.data_params[0]["columns"])
+
+def columns_with_comma_test():
+	client = FakeClient()
+	eq_([[u"p", 1], [u"q", 2]], list(DSSDataset(client, "P", "d").iter_rows(columns=["a,b", "id"])))
+	eq_(None, client.data_params[0]["columns"])
+
+def unknown_column_test():
+	client = FakeClient()
+	try:
+		DSSDataset(client, "P", "d").iter_rows(columns=["id", "missing"])
+		ok_(False, "Expected a ValueError")
+	except ValueError:
+		pass
+	eq_([], client.streams)
+
+def export_to_parquet_columns_test():
+	try:
+		import pyarrow.parquet as pq
+	except ImportError:
+		raise SkipTest("pyarrow is not installed")
+	client = FakeClient()
+	tmp_dir = tempfile.mkdtemp()
+	try:
+		path = os.path.join(tmp_dir, "d.parquet")
+		DSSDataset(client, "P", "d").export_to_parquet(path, columns=["score", "id"], limit=1)
+		table = pq.read_table(path)
+		eq_(["score", "id"], table.schema.names)
+		eq_({"score" : [0.5], "id" : [1]}, table.to_pydict())
+	finally:
+		shutil.rmtree(tmp_dir)
+	eq_("id,score", client.data_params[0]["columns"])
+	eq_(1, json.loads(client.data_params[0]["sampling"])["maxRecords"])
@@ -24,12 +24,24 @@ def dataset_data_test():
 	p = client.get_project(testProjectKey)
 	d = p.get_dataset(testDataset)
 	counter = 0
-	for r in d.iter_rows():
+	for r in d.iter_rows(limit=6):
 		counter = counter + 1
-		if counter > 5:
-			break
 	eq_(6, counter)
-	# note : backend will get a pipe broken
+
+def dataset_data_columns_test():
+	client = DSSClient(host, apiKey)
+	d = client.get_project(testProjectKey).get_dataset(testDataset)
+	columns = [col['name'] for col in d.get_schema()['columns']][:2]
+	for r in d.iter_rows(columns=list(reversed(columns)), limit=10):
+		eq_(2, len(r))
+
+def dataset_dataframe_test():
+	client = DSSClient(host, apiKey)
+	d = client.get_project(testProjectKey).get_dataset(testDataset)
+	columns = [col['name'] for col in d.get_schema()['columns']]
+	df = d.to_dataframe()
+	eq_(columns, list(df.columns))
+	eq_(len(df), sum(len(batch[columns[0]]) for batch in d.iter_batches(batch_size=1000)))
 	
 def sync_metastore_test():
 	client = DSSClient(host, apiKey)
@@ -49,6 +61,17 @@ def list_partitions_test():
 	dataset = client.get_project(testPartitionedProjectKey).get_dataset(testPartitionedDataset)
 	ok_(len(dataset.list_partitions()) > 0)
 
+def partition_batches_test():
+	client = DSSClient(host, apiKey)
+	dataset = client.get_project(testPartitionedProjectKey).get_dataset(testPartitionedDataset)
+	partitions = dataset.list_partitions()
+	seen = []
+	for (partition, rows) in dataset.iter_partition_batches(max_workers=4, preserve_order=True):
+		ok_(partition in partitions)
+		if len(seen) == 0 or seen[-1] != partition:
+			seen.append(partition)
+	eq_(len(seen), len(set(seen)))
+
 def clear_partitions_test():
 	client = DSSClient(host, apiKey)
 	dataset = client.get_project(testPartitionedProjectKey).get_dataset(testDropPartitionedDataset)
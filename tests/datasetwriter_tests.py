@@ -0,0 +1,159 @@
+from dataikuapi.dss.dataset import DSSDataset
+from dataikuapi.utils import DataikuException, ExpiringLRUCache
+from datetime import datetime, date
+from dateutil.tz import tzoffset
+import gzip, io
+from nose.plugins.skip import SkipTest
+from nose.tools import ok_
+from nose.tools import eq_
+from nose.tools import raises
+
+# Tests of the dataset writer against a fake DSS instance
+
+SCHEMA = [{"name" : "i", "type" : "bigint"}, {"name" : "f", "type" : "double"}, {"name" : "b", "type" : "boolean"},
+		  {"name" : "d", "type" : "date"}, {"name" : "s", "type" : "string"}]
+
+class FakeClient(object):
+	"""
+	Answers the definition and schema of a "Files in folder" dataset, and keeps the uploaded files
+	"""
+	def __init__(self, schema=SCHEMA, dataset_type="FilesInFolder", format_params={}, dimensions=[]):
+		self.definition = {"type" : dataset_type, "formatType" : "csv", "formatParams" : format_params,
+						   "params" : {"folderSmartId" : "F.folder"}, "partitioning" : {"dimensions" : dimensions}}
+		self.schema = schema
+		self.uploads = []
+		self._schema_cache = ExpiringLRUCache()
+
+	def _perform_json(self, method, path, params=None, body=None):
+		if path == "/projects/P/datasets/d":
+			return self.definition
+		if path == "/projects/P/datasets/d/schema":
+			return {"columns" : self.schema}
+		raise Exception("Unexpected call %s %s" % (method, path))
+
+	def _perform_json_upload(self, method, path, name, f):
+		self.uploads.append((path, name, f.read()))
+
+	def files(self):
+		"""
+		The names and uncompressed contents of the uploaded files
+		"""
+		return [(name, gzip.GzipFile(fileobj=io.BytesIO(data)).read()) for (path, name, data) in self.uploads]
+
+def get_writer(client, **kwargs):
+	return DSSDataset(client, "P", "d").get_writer(**kwargs)
+
+def formats_test():
+	client = FakeClient()
+	with get_writer(client) as writer:
+		writer.write_row([1, 1.5, True, datetime(2017, 1, 31, 23, 59, 58, 999999), u"\u00e9"])
+		writer.write_row([None, None, None, None, None])
+		writer.write_row([-2, 3, False, date(2017, 1, 31), "a\tb"])
+		writer.write_row([2 ** 70, 0.1, 0, datetime(2017, 2, 1, 1, 0, tzinfo=tzoffset(None, 3600)), 12])
+	eq_(1, len(client.uploads))
+	eq_("/projects/F/managedfolders/folder/contents/", client.uploads[0][0])
+	(name, content) = client.files()[0]
+	eq_([
+		"1\t1.5\ttrue\t2017-01-31T23:59:58.999Z\t\xc3\xa9",
+		"\t\t\t\t",
+		"-2\t3.0\tfalse\t2017-01-31T00:00:00.000Z\t\"a\tb\"",
+		"%d\t0.1\tfalse\t2017-02-01T00:00:00.000Z\t12" % 2 ** 70,
+		""], content.split("\n"))
+
+def import_numpy():
+	try:
+		import numpy
+		return numpy
+	except ImportError:
+		raise SkipTest("numpy is not installed")
+
+def numpy_values_test():
+	np = import_numpy()
+	client = FakeClient()
+	with get_writer(client) as writer:
+		writer.write_row([np.int64(1), np.float32(0.5), np.bool_(True), None, None])
+		writer.write_row([np.int8(-1), np.float64(2), np.False_, None, None])
+	eq_("1\t0.5\ttrue\t\t\n-1\t2.0\tfalse\t\t\n", client.files()[0][1])
+
+def invalid_values_test():
+	writer = get_writer(FakeClient())
+	for (index, value) in [(0, 1.5), (0, True), (0, "1"), (1, "1.5"), (2, "true"), (3, "2017-01-31")]:
+		row = [None] * len(SCHEMA)
+		row[index] = value
+		try:
+			writer.write_row(row)
+			ok_(False, "Expected a ValueError for %r" % (value,))
+		except ValueError as e:
+			ok_(("column %s" % SCHEMA[index]["name"]) in str(e), str(e))
+
+@raises(ValueError)
+def numpy_array_test():
+	np = import_numpy()
+	get_writer(FakeClient()).write_row([None, None, np.array([True]), None, None])
+
+@raises(ValueError)
+def row_width_test():
+	get_writer(FakeClient()).write_row([1, 2])
+
+def chunks_test():
+	client = FakeClient(schema=[{"name" : "i", "type" : "int"}])
+	writer = get_writer(client, chunk_rows=2)
+	writer.write_rows([[i] for i in range(5)])
+	eq_(2, len(client.uploads))
+	writer.close()
+	files = client.files()
+	eq_(["0\n1\n", "2\n3\n", "4\n"], [content for (name, content) in files])
+	names = [name for (name, content) in files]
+	ok_(all(name.startswith(writer.file_prefix) for name in names))
+	eq_(["-00000.csv.gz", "-00001.csv.gz", "-00002.csv.gz"], [name[len(writer.file_prefix):] for name in names])
+	# Closing again does not upload an empty chunk
+	writer.close()
+	eq_(3, len(client.uploads))
+
+def stats_test():
+	client = FakeClient(schema=[{"name" : "i", "type" : "int"}])
+	writer = get_writer(client, chunk_rows=2)
+	writer.write_rows([[i] for i in range(5)])
+	writer.close()
+	stats = writer.get_stats()
+	eq_(5, stats["rows"])
+	eq_(3, stats["chunks"])
+	eq_(10, stats["rawBytes"])
+	eq_(sum(len(data) for (path, name, data) in client.uploads), stats["sentBytes"])
+	ok_(stats["rowsPerSecond"] >= 0)
+
+def header_and_separator_test():
+	client = FakeClient(schema=[{"name" : "a", "type" : "string"}, {"name" : u"\u00e9", "type" : "int"}],
+						format_params={"separator" : ",", "quoteChar" : "'", "parseHeaderRow" : True})
+	writer = get_writer(client, chunk_rows=1)
+	writer.write_rows([["x,y", 1], ["z", 2]])
+	writer.close()
+	eq_(["a,\xc3\xa9\n'x,y',1\n", "a,\xc3\xa9\nz,2\n"], [content for (name, content) in client.files()])
+
+def partition_test():
+	client = FakeClient(dimensions=[{"name" : "country"}, {"name" : "day"}])
+	with get_writer(client, partition="FR|2017-01-31") as writer:
+		writer.write_row([1, None, None, None, None])
+	ok_(client.files()[0][0].startswith("FR/2017-01-31/part-"))
+
+def exception_discards_chunk_test():
+	client = FakeClient()
+	try:
+		with get_writer(client) as writer:
+			writer.write_row([1, None, None, None, None])
+			raise KeyError("stop")
+	except KeyError:
+		pass
+	eq_([], client.uploads)
+
+@raises(ValueError)
+def missing_partition_test():
+	get_writer(FakeClient(dimensions=[{"name" : "country"}]))
+
+@raises(ValueError)
+def unexpected_partition_test():
+	get_writer(FakeClient(), partition="FR")
+
+@raises(DataikuException)
+def not_in_folder_test():
+	get_writer(FakeClient(dataset_type="PostgreSQL"))
@@ -12,6 +12,11 @@ def list_jobs_test():
 	jobs = client.get_project(testProjectKey).list_jobs()
 	ok_(len(jobs) > 0)
 
+def iter_jobs_test():
+	client = DSSClient(host, apiKey)
+	project = client.get_project(testProjectKey)
+	eq_([job['def']['id'] for job in project.list_jobs()], [job['def']['id'] for job in project.iter_jobs()])
+
 def job_status_test():
 	client = DSSClient(host, apiKey)
 	project = client.get_project(testProjectKey)
@@ -28,6 +33,16 @@ def job_log_test():
 		log = project.get_job(job['def']['id']).get_log()
 		ok_(log is not None)
 
+def job_tail_log_test():
+	client = DSSClient(host, apiKey)
+	project = client.get_project(testProjectKey)
+	jobs = project.list_jobs()
+	for job in jobs:
+		if job['baseStatus']['state'] in ('DONE', 'FAILED', 'ABORTED'):
+			job = project.get_job(job['def']['id'])
+			eq_(job.get_log(), u''.join(job.tail_log()))
+			break
+
 
 def job_start_abort_test():
 	client = DSSClient(host, apiKey)
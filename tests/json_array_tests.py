@@ -0,0 +1,105 @@
+from dataikuapi.utils import iter_json_array
+import json
+from nose.tools import ok_
+from nose.tools import eq_
+from nose.tools import raises
+
+# Tests of the incremental JSON array parser, which do not need a DSS instance
+
+def splits(doc):
+	"""
+	The ways of cutting doc in chunks: in one piece, in one-byte pieces, and in two pieces at every position
+	"""
+	yield [doc]
+	yield list(doc)
+	for i in range(1, len(doc)):
+		yield [doc[:i], doc[i:]]
+
+def check_all_splits(doc, expected, key=None):
+	for chunks in splits(doc):
+		eq_(expected, list(iter_json_array(chunks, key)), "chunks: %r" % (chunks,))
+
+def array_test():
+	items = [1, -2.5e3, True, None, "a", {"b" : [1, {"c" : []}]}, [], [[1], [2, [3]]], {}]
+	check_all_splits(json.dumps(items), items)
+
+def empty_array_test():
+	check_all_splits('  [ ] ', [])
+
+def whitespace_test():
+	check_all_splits('\n[ 1 ,\n\t{ "a" : 2 } ]\n', [1, {"a" : 2}])
+
+def strings_test():
+	items = ['"', '\\', '\\"', 'a,b]', '[{', '}', '\\\\"]', u'\u00e9\u4e2d', '\n\t/']
+	check_all_splits(json.dumps(items), items)
+	check_all_splits(json.dumps(items, ensure_ascii=False).encode("utf8"), items)
+
+def string_escapes_test():
+	check_all_splits('["a\\"b", "\\\\", "\\u00e9\\/", {"k\\"]" : "]"}]', [u'a"b', u'\\', u'\u00e9/', {u'k"]' : u']'}])
+
+def empty_chunks_test():
+	eq_([1, 2], list(iter_json_array(["", "[1", "", ",2", "]", ""])))
+
+def custom_loads_test():
+	eq_(["1", "[2, 3]"], list(iter_json_array(['[1, [2, 3]]'], loads=lambda text: text)))
+
+def keyed_test():
+	doc = json.dumps({"before" : [0, {"items" : [-1]}], "items" : [1, {"items" : [2]}, "items"], "after" : [3]})
+	expected = json.loads(doc)["items"]
+	check_all_splits(doc, expected, key="items")
+
+def keyed_nested_key_test():
+	# Only top-level keys match
+	check_all_splits('{"a" : {"items" : [1]}, "items" : [2]}', [2], key="items")
+
+def keyed_string_value_test():
+	# A string value equal to the key is not the key
+	check_all_splits('{"a" : "items", "b" : [1], "items" : [2]}', [2], key="items")
+
+def keyed_escaped_key_test():
+	check_all_splits('{"it\\u0065ms" : [1, 2]}', [1, 2], key="items")
+
+def missing_key_test():
+	check_all_splits('{"a" : [1], "b" : {"items" : [2]}, "c" : "items"}', [], key="items")
+
+def missing_key_empty_object_test():
+	check_all_splits('{}', [], key="items")
+
+def truncated_test():
+	for doc in ['[1, 2, {"a" : [3]}]', '{"x" : 1, "items" : ["a\\"b", 2]}']:
+		key = "items" if doc.startswith("{") else None
+		# In keyed mode, the rest of the document is not read once the array is closed
+		for end in range(doc.rindex("]")):
+			try:
+				list(iter_json_array([doc[:end]], key))
+			except ValueError:
+				continue
+			ok_(False, "No error for truncated document %r" % doc[:end])
+
+def truncated_in_string_test():
+	for chunks in splits('["abc\\"'):
+		try:
+			list(iter_json_array(chunks))
+		except ValueError:
+			continue
+		ok_(False, "No error for %r" % (chunks,))
+
+@raises(ValueError)
+def empty_document_test():
+	list(iter_json_array([]))
+
+@raises(ValueError)
+def not_an_array_test():
+	list(iter_json_array(['{"a" : [1]}']))
+
+@raises(ValueError)
+def missing_item_test():
+	list(iter_json_array(['[1, , 2]']))
+
+@raises(ValueError)
+def leading_comma_test():
+	list(iter_json_array(['[, 1]']))
+
+@raises(ValueError)
+def invalid_item_test():
+	list(iter_json_array(['[1, tru]']))
@@ -0,0 +1,129 @@
+from dataikuapi.polling import PollingScheduler
+from dataikuapi.utils import DataikuException
+import threading, time
+from nose.tools import ok_
+from nose.tools import eq_
+from nose.tools import raises
+
+# Tests of the background polling scheduler, which do not need a DSS instance
+
+class FakeOperation(object):
+	"""
+	An operation done with value at the polls-th poll, or never if polls is None
+	"""
+	def __init__(self, polls, value=None):
+		self.polls = polls
+		self.value = value
+		self.calls = 0
+
+	def poll(self):
+		self.calls += 1
+		if self.polls is not None and self.calls >= self.polls:
+			return (True, self.value)
+		return (False, None)
+
+def submit(scheduler, operation, **kwargs):
+	return scheduler.submit(operation.poll, "test operation", initial_interval=0.001, max_interval=0.01, **kwargs)
+
+def wait_for_thread_exit(scheduler):
+	deadline = time.time() + 5
+	while scheduler._thread is not None:
+		ok_(time.time() < deadline, "The polling thread did not exit")
+		time.sleep(0.01)
+
+def completion_test():
+	scheduler = PollingScheduler()
+	operation = FakeOperation(3, "value")
+	pending = submit(scheduler, operation)
+	eq_("value", pending.result(timeout=5))
+	ok_(pending.done())
+	ok_(not pending.cancelled())
+	eq_(None, pending.exception())
+	eq_(3, operation.calls)
+
+def many_operations_test():
+	scheduler = PollingScheduler()
+	operations = [FakeOperation(i % 5 + 1, i) for i in range(50)]
+	pendings = [submit(scheduler, operation) for operation in operations]
+	eq_(range(50), [pending.result(timeout=5) for pending in pendings])
+
+def failing_poll_test():
+	def poll():
+		raise ValueError("poll failed")
+	pending = PollingScheduler().submit(poll, "test operation")
+	ok_(isinstance(pending.exception(timeout=5), ValueError))
+	try:
+		pending.result()
+		ok_(False, "Expected a ValueError")
+	except ValueError as e:
+		eq_("poll failed", str(e))
+
+def timeout_test():
+	operation = FakeOperation(None)
+	pending = submit(PollingScheduler(), operation, timeout=0.05)
+	ok_(isinstance(pending.exception(timeout=5), DataikuException))
+	ok_(operation.calls > 1)
+	calls = operation.calls
+	time.sleep(0.05)
+	eq_(calls, operation.calls)
+
+@raises(DataikuException)
+def result_timeout_test():
+	pending = submit(PollingScheduler(), FakeOperation(None))
+	try:
+		pending.result(timeout=0.05)
+	finally:
+		pending.cancel()
+
+def cancel_test():
+	scheduler = PollingScheduler()
+	operation = FakeOperation(None)
+	pending = submit(scheduler, operation)
+	time.sleep(0.02)
+	ok_(pending.cancel())
+	ok_(pending.done())
+	ok_(pending.cancelled())
+	ok_(isinstance(pending.exception(), DataikuException))
+	ok_(not pending.cancel())
+	# The cancelled operation is not polled anymore
+	wait_for_thread_exit(scheduler)
+	calls = operation.calls
+	time.sleep(0.05)
+	eq_(calls, operation.calls)
+
+def cancel_done_test():
+	pending = submit(PollingScheduler(), FakeOperation(1, "value"))
+	eq_("value", pending.result(timeout=5))
+	ok_(not pending.cancel())
+	ok_(not pending.cancelled())
+
+def done_callbacks_test():
+	scheduler = PollingScheduler()
+	done = threading.Event()
+	called = []
+	pending = submit(scheduler, FakeOperation(2, "value"))
+	pending.add_done_callback(lambda p: called.append(("first", p.result())))
+	pending.add_done_callback(lambda p: 1 / 0)
+	pending.add_done_callback(lambda p: done.set())
+	ok_(done.wait(5))
+	# A callback raising does not prevent the next ones
+	eq_([("first", "value")], called)
+	# Callbacks added once done are called immediately
+	pending.add_done_callback(lambda p: called.append(("late", p.result())))
+	eq_([("first", "value"), ("late", "value")], called)
+
+def submit_after_thread_exit_test():
+	scheduler = PollingScheduler()
+	eq_(1, submit(scheduler, FakeOperation(2, 1)).result(timeout=5))
+	wait_for_thread_exit(scheduler)
+	eq_(2, submit(scheduler, FakeOperation(2, 2)).result(timeout=5))
+	wait_for_thread_exit(scheduler)
+
+def submit_while_waiting_test():
+	scheduler = PollingScheduler()
+	slow = scheduler.submit(FakeOperation(None).poll, "slow operation", initial_interval=0.5)
+	# A task due sooner than the one the thread waits for is polled without waiting for it
+	eq_("fast", submit(scheduler, FakeOperation(1, "fast")).result(timeout=5))
+	ok_(not slow.done())
+	slow.cancel()
+	wait_for_thread_exit(scheduler)
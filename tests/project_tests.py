@@ -26,6 +26,15 @@ def project_permissions_test():
 	ok_(perms is not None)
 	project.set_permissions(perms)
 	
+def list_projects_datasets_concurrently_test():
+	client = DSSClient(host, apiKey)
+	keys = client.list_project_keys()
+	results = client.map_concurrent(lambda key: client.get_project(key).list_datasets(), keys, max_workers=4)
+	eq_(len(keys), len(results))
+	for key, result in zip(keys, results):
+		eq_(key, result.item)
+		ok_(result.is_success())
+
 def project_create_delete_test():
 	client = DSSClient(host, apiKey)
 	count = len(client.list_project_keys())
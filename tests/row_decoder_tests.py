@@ -0,0 +1,104 @@
+from dataikuapi.utils import make_record_class, make_row_decoder, parse_iso_date, make_date_parser
+from datetime import datetime
+from dateutil.tz import tzutc
+from nose.tools import ok_
+from nose.tools import eq_
+from nose.tools import raises
+
+# Tests of the row decoding helpers, which do not need a DSS instance
+
+def columns(*names):
+	return [{"name" : name, "type" : "string"} for name in names]
+
+def record_fields_test():
+	eq_(("a", "my_col", "f_1st"), make_record_class(columns("a", "my col", "1st"))._fields)
+
+def record_empty_name_test():
+	eq_(("f_",), make_record_class(columns(""))._fields)
+
+def record_duplicate_names_test():
+	eq_(("a", "a_1", "a_b", "a_b_3"), make_record_class(columns("a", "a", "a b", "a-b"))._fields)
+
+def record_non_ascii_names_test():
+	eq_(("caf_", "f__"), make_record_class(columns(u"caf\u00e9", u"\u4e2d"))._fields)
+	eq_(("caf__",), make_record_class(columns(u"caf\u00e9".encode("utf8")))._fields)
+
+def record_keyword_names_test():
+	eq_(("f_class", "f_None", "f_True", "f_False"), make_record_class(columns("class", "None", "True", "False"))._fields)
+
+def record_reserved_names_test():
+	Record = make_record_class(columns("self", "_fields", "_make", "values"))
+	eq_(("self", "f__fields", "f__make", "values"), Record._fields)
+	record = Record(1, 2, 3, 4)
+	eq_(1, record.self)
+	eq_(2, record.f__fields)
+	eq_([1, 2, 3, 4], list(record))
+
+def record_access_test():
+	Record = make_record_class(columns("a", "b", "c"))
+	record = Record._make(["x", "y", "z"])
+	eq_("y", record.b)
+	eq_("z", record[2])
+	eq_(["x", "y"], record[:2])
+	eq_(3, len(record))
+	eq_(Record("x", "y", "z"), record)
+	ok_(record != Record("x", "y", None))
+	eq_("Record(a='x', b='y', c='z')", repr(record))
+
+def record_no_columns_test():
+	eq_(0, len(make_record_class([])()))
+
+@raises(TypeError)
+def record_wrong_width_test():
+	make_record_class(columns("a", "b"))(1)
+
+SCHEMA = [{"name" : "i", "type" : "bigint"}, {"name" : "f", "type" : "double"},
+		  {"name" : "b", "type" : "boolean"}, {"name" : "s", "type" : "string"}]
+
+def decode_list_test():
+	decode_row = make_row_decoder(SCHEMA)
+	eq_([1, 2.5, True, u"x"], decode_row(["1", "2.5", "true", "x"]))
+	eq_([None, None, False, u""], decode_row(["", "a", "false", ""]))
+	eq_([1, None, False, None], decode_row(["1"]))
+	eq_([1, 2.5, True, u"x", None], decode_row(["1", "2.5", "true", "x", "extra"]))
+
+def decode_tuple_test():
+	decode_row = make_row_decoder(SCHEMA, "tuple")
+	eq_((1, 2.5, True, u"x"), decode_row(["1", "2.5", "true", "x"]))
+	eq_((1, None, False, None), decode_row(["1"]))
+	eq_((1, 2.5, True, u"x"), decode_row(["1", "2.5", "true", "x", "extra"]))
+
+def decode_record_test():
+	record = make_row_decoder(SCHEMA, "record")(["1", "2.5", "true", "x"])
+	eq_(1, record.i)
+	eq_(u"x", record.s)
+
+def decode_buffer_test():
+	decode_row = make_row_decoder(SCHEMA, "buffer")
+	first = decode_row(["1", "2.5", "true", "x"])
+	second = decode_row(["2"])
+	ok_(first is second)
+	eq_([2, None, False, None], second)
+
+@raises(ValueError)
+def decode_unknown_row_type_test():
+	make_row_decoder(SCHEMA, "dict")
+
+def parse_dss_date_test():
+	eq_(datetime(2017, 1, 31, 23, 59, 58, 999000, tzutc()), parse_iso_date("2017-01-31T23:59:58.999Z"))
+
+def parse_other_date_test():
+	eq_(datetime(2017, 1, 31, 23, 59, 58, tzinfo=tzutc()), parse_iso_date("2017-01-31T23:59:58Z"))
+	eq_(datetime(2017, 1, 31), parse_iso_date("2017-01-31"))
+
+def parse_invalid_date_test():
+	eq_(None, parse_iso_date(""))
+	eq_(None, parse_iso_date(None))
+	eq_(None, parse_iso_date("not a date"))
+	# Right layout but invalid values go to the generic parser, which fails too
+	eq_(None, parse_iso_date("2017-02-30T00:00:00.000Z"))
+
+def date_parser_cache_test():
+	parse = make_date_parser(cache_size=2)
+	for s in ["2017-01-31T23:59:58.999Z", "2017-01-31T23:59:58.999Z", "2018-01-01", "2019-01-01", ""]:
+		eq_(parse_iso_date(s), parse(s))
@@ -0,0 +1,145 @@
+from dataikuapi.dss.scenario import DSSScenario
+from dataikuapi.dss.scenariohistory import DSSScenarioHistoryStore
+import re
+from nose.tools import ok_
+from nose.tools import eq_
+from nose.tools import raises
+
+# Tests of the scenario run history store against a fake DSS instance
+
+class FakeClient(object):
+	"""
+	Answers the last runs of scenarios, newest first, from lists of runs oldest first
+	"""
+	def __init__(self):
+		self.runs = {}
+		self.limits = []
+		self.count = 0
+
+	def add_runs(self, key, *runs):
+		"""
+		Add finished runs, each as a (duration in milliseconds, outcome) tuple
+		"""
+		runs_of_key = self.runs.setdefault(key, [])
+		for (duration, outcome) in runs:
+			self.count += 1
+			start = 1000000 + 10000 * self.count
+			runs_of_key.append({"runId" : "run-%d" % self.count, "start" : start, "end" : start + duration,
+								"result" : {"outcome" : outcome}})
+
+	def _perform_json(self, method, path, params=None, body=None):
+		(project_key, scenario_id) = re.match(r"/projects/([^/]+)/scenarios/([^/]+)/get-last-runs", path).groups()
+		self.limits.append(params["limit"])
+		runs = self.runs.get("%s.%s" % (project_key, scenario_id), [])
+		return list(reversed(runs))[:params["limit"]]
+
+def successes(*durations):
+	return [(duration, "SUCCESS") for duration in durations]
+
+def first_refresh_test():
+	client = FakeClient()
+	client.add_runs("P.a", (1505, "SUCCESS"), (200, "FAILED"), (2000, "WARNING"))
+	store = DSSScenarioHistoryStore(client, max_runs=100)
+	eq_("P.a", store.add(DSSScenario(client, "P", "a")))
+	eq_({"P.a" : 3}, store.refresh())
+	eq_([100], client.limits)
+	eq_([1.505, 2.0], list(store.get_durations("P.a")))
+	eq_([1.505, 0.2, 2.0], list(store.get_durations("P.a", only_successful=False)))
+
+def incremental_refresh_test():
+	client = FakeClient()
+	client.add_runs("P.a", *successes(1000, 2000))
+	store = DSSScenarioHistoryStore(client, max_runs=100, page_size=2)
+	store.add("P.a")
+	store.refresh()
+	eq_({"P.a" : 0}, store.refresh())
+	client.add_runs("P.a", *successes(*range(3000, 8000, 1000)))
+	client.limits = []
+	eq_({"P.a" : 5}, store.refresh())
+	# The page grows until it reaches the stored runs
+	eq_([2, 8], client.limits)
+	eq_([1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0], list(store.get_durations("P.a")))
+
+def deleted_runs_test():
+	client = FakeClient()
+	client.add_runs("P.a", *successes(1000, 2000, 3000, 4000, 5000))
+	store = DSSScenarioHistoryStore(client, max_runs=100)
+	store.add("P.a")
+	store.refresh()
+	# The last stored run is deleted on DSS
+	client.runs["P.a"].pop()
+	eq_({"P.a" : 0}, store.refresh())
+	eq_(5, len(store.get_durations("P.a")))
+	client.add_runs("P.a", *successes(6000))
+	eq_({"P.a" : 1}, store.refresh())
+	eq_([1.0, 2.0, 3.0, 4.0, 5.0, 6.0], list(store.get_durations("P.a")))
+
+def truncation_test():
+	client = FakeClient()
+	client.add_runs("P.a", *successes(1000, 2000, 3000, 4000))
+	store = DSSScenarioHistoryStore(client, max_runs=3, page_size=2)
+	store.add("P.a")
+	eq_({"P.a" : 3}, store.refresh())
+	eq_([2.0, 3.0, 4.0], list(store.get_durations("P.a")))
+	client.add_runs("P.a", *successes(5000, 6000))
+	eq_({"P.a" : 2}, store.refresh())
+	eq_([4.0, 5.0, 6.0], list(store.get_durations("P.a")))
+
+def stats_test():
+	client = FakeClient()
+	client.add_runs("P.a", (1000, "SUCCESS"), (500, "FAILED"), (2000, "SUCCESS"), (3000, "WARNING"), (4000, "SUCCESS"), (100, "ABORTED"))
+	store = DSSScenarioHistoryStore(client)
+	store.add("P.a")
+	store.refresh()
+	stats = store.get_stats("P.a", percentiles=(0, 50, 90, 100))
+	eq_(6, stats["runs"])
+	eq_(4, stats["successfulRuns"])
+	eq_(2.0 / 6, stats["failureRate"])
+	eq_(2.5, stats["meanDuration"])
+	eq_(1.0, stats["minDuration"])
+	eq_(4.0, stats["maxDuration"])
+	eq_(1060.0, stats["lastStart"])
+	eq_({0 : 1.0, 50 : 2.5, 90 : 3.7, 100 : 4.0}, dict((p, round(v, 9)) for (p, v) in stats["percentiles"].items()))
+
+def last_runs_stats_test():
+	client = FakeClient()
+	client.add_runs("P.a", (1000, "SUCCESS"), (500, "FAILED"), (2000, "SUCCESS"), (3000, "SUCCESS"))
+	store = DSSScenarioHistoryStore(client)
+	store.add("P.a")
+	store.refresh()
+	stats = store.get_stats("P.a", last=3)
+	eq_(3, stats["runs"])
+	eq_(1.0 / 3, stats["failureRate"])
+	eq_(2.5, stats["percentiles"][50])
+	eq_([3.0], list(store.get_durations("P.a", last=1)))
+
+def no_runs_stats_test():
+	client = FakeClient()
+	store = DSSScenarioHistoryStore(client)
+	store.add("P.a")
+	store.refresh()
+	stats = store.get_stats("P.a")
+	eq_(0, stats["runs"])
+	eq_(None, stats["failureRate"])
+	eq_(None, stats["meanDuration"])
+	eq_(None, stats["percentiles"][50])
+
+def all_stats_test():
+	client = FakeClient()
+	client.add_runs("P.a", *successes(1000))
+	client.add_runs("Q.b", *successes(2000, 4000))
+	store = DSSScenarioHistoryStore(client)
+	store.add("P.a")
+	store.add("Q.b")
+	eq_({"P.a" : 1, "Q.b" : 2}, store.refresh())
+	stats = store.get_all_stats()
+	eq_(1.0, stats["P.a"]["meanDuration"])
+	eq_(3.0, stats["Q.b"]["meanDuration"])
+
+@raises(ValueError)
+def unknown_scenario_test():
+	DSSScenarioHistoryStore(FakeClient()).get_stats("P.a")
+
+@raises(ValueError)
+def invalid_key_test():
+	DSSScenarioHistoryStore(FakeClient()).add("a")
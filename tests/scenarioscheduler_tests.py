@@ -0,0 +1,173 @@
+from dataikuapi.dss.scenario import DSSScenario
+from dataikuapi.dss.scenarioscheduler import DSSScenarioScheduler
+from dataikuapi.utils import DataikuException
+import re
+from nose.tools import ok_
+from nose.tools import eq_
+from nose.tools import raises
+
+# Tests of the scenario scheduler against a fake DSS instance
+
+class FakeClient(object):
+	"""
+	Answers the calls of the scheduler. A run finishes with the outcome of its scenario at the
+	polls-th poll of its scenario's last runs; scenarios without an outcome cannot be launched
+	"""
+	def __init__(self, outcomes, polls=2):
+		self.outcomes = outcomes
+		self.polls = polls
+		self.runs = {}
+		self.launched = []
+		self.running = set()
+		self.max_running = 0
+		self.max_running_by_project = {}
+
+	def _perform_json(self, method, path, params=None, body=None):
+		(project_key, scenario_id, action) = re.match(r"/projects/([^/]+)/scenarios/([^/]+)/(.*)", path).groups()
+		key = "%s.%s" % (project_key, scenario_id)
+		if action == "run":
+			if self.outcomes.get(key) is None:
+				raise DataikuException("Cannot run %s" % key)
+			self.launched.append(key)
+			self.running.add(key)
+			self.runs[key] = {"runId" : "run-%s" % key, "trigger" : {"id" : "manual"}, "polls" : 0}
+			self.max_running = max(self.max_running, len(self.running))
+			in_project = len([running for running in self.running if running.startswith(project_key + ".")])
+			self.max_running_by_project[project_key] = max(self.max_running_by_project.get(project_key, 0), in_project)
+			return {"runId" : self.runs[key]["runId"], "trigger" : {"id" : "manual"}}
+		elif action == "get-run-for-trigger":
+			return {"scenarioRun" : {"runId" : self.runs[key]["runId"]}}
+		elif action == "get-last-runs":
+			run = self.runs[key]
+			run["polls"] += 1
+			if run["polls"] < self.polls:
+				return [{"runId" : run["runId"]}]
+			self.running.discard(key)
+			return [{"runId" : run["runId"], "result" : {"outcome" : self.outcomes[key]}}]
+		raise Exception("Unexpected call %s %s" % (method, path))
+
+def new_scheduler(client, **kwargs):
+	return DSSScenarioScheduler(client, initial_interval=0, max_interval=0, **kwargs)
+
+def add_all(scheduler, client, dependencies):
+	for key in sorted(client.outcomes.keys()):
+		(project_key, scenario_id) = key.split(".")
+		scheduler.add(DSSScenario(client, project_key, scenario_id), depends_on=dependencies.get(key, []))
+
+def dependency_order_test():
+	client = FakeClient({"P.a" : "SUCCESS", "P.b" : "WARNING", "P.c" : "SUCCESS", "Q.d" : "SUCCESS"})
+	scheduler = new_scheduler(client, max_running=1)
+	add_all(scheduler, client, {"P.a" : ["P.b"], "P.b" : ["Q.d", "P.c"]})
+	report = scheduler.run()
+	eq_({"P.a" : "SUCCESS", "P.b" : "WARNING", "P.c" : "SUCCESS", "Q.d" : "SUCCESS"}, report["outcomes"])
+	eq_("P.a", client.launched[-1])
+	eq_("P.b", client.launched[-2])
+	eq_("P.a", report["criticalPath"][-1])
+	eq_(set(["P.a", "P.b", "P.c", "Q.d"]), set(report["runs"].keys()))
+
+def skip_propagation_test():
+	client = FakeClient({"P.a" : "FAILED", "P.b" : "SUCCESS", "P.c" : "SUCCESS", "P.d" : "SUCCESS"})
+	scheduler = new_scheduler(client)
+	add_all(scheduler, client, {"P.b" : ["P.a"], "P.c" : ["P.b"]})
+	report = scheduler.run()
+	eq_({"P.a" : "FAILED", "P.b" : "SKIPPED", "P.c" : "SKIPPED", "P.d" : "SUCCESS"}, report["outcomes"])
+	eq_(["P.a", "P.d"], sorted(client.launched))
+	eq_(["P.a", "P.d"], sorted(report["timings"].keys()))
+
+def launch_error_test():
+	client = FakeClient({"P.a" : None, "P.b" : "SUCCESS", "P.c" : "SUCCESS"})
+	scheduler = new_scheduler(client)
+	add_all(scheduler, client, {"P.b" : ["P.a"]})
+	report = scheduler.run()
+	eq_({"P.a" : "FAILED", "P.b" : "SKIPPED", "P.c" : "SUCCESS"}, report["outcomes"])
+	ok_("Cannot run P.a" in report["errors"]["P.a"])
+	ok_("P.a" not in report["runs"])
+
+def max_running_test():
+	client = FakeClient(dict(("P.s%d" % i, "SUCCESS") for i in range(7)))
+	scheduler = new_scheduler(client, max_running=3)
+	add_all(scheduler, client, {})
+	report = scheduler.run()
+	eq_(7, len(client.launched))
+	eq_(3, client.max_running)
+	ok_(all(outcome == "SUCCESS" for outcome in report["outcomes"].values()))
+
+def max_running_per_project_test():
+	outcomes = dict(("P.s%d" % i, "SUCCESS") for i in range(5))
+	outcomes.update(dict(("Q.s%d" % i, "SUCCESS") for i in range(5)))
+	client = FakeClient(outcomes)
+	scheduler = new_scheduler(client, max_running=10, max_running_per_project=2)
+	add_all(scheduler, client, {})
+	scheduler.run()
+	eq_(10, len(client.launched))
+	eq_({"P" : 2, "Q" : 2}, client.max_running_by_project)
+	eq_(4, client.max_running)
+
+@raises(ValueError)
+def no_running_slot_test():
+	new_scheduler(FakeClient({}), max_running=0)
+
+@raises(ValueError)
+def no_running_limit_test():
+	new_scheduler(FakeClient({}), max_running=None)
+
+@raises(ValueError)
+def no_running_slot_per_project_test():
+	new_scheduler(FakeClient({}), max_running_per_project=0)
+
+def dependency_by_scenario_test():
+	client = FakeClient({"P.a" : "SUCCESS", "P.b" : "SUCCESS"})
+	scheduler = new_scheduler(client)
+	a = DSSScenario(client, "P", "a")
+	eq_("P.b", scheduler.add(DSSScenario(client, "P", "b"), depends_on=[a]))
+	scheduler.add(a)
+	scheduler.run()
+	eq_(["P.a", "P.b"], client.launched)
+
+@raises(ValueError)
+def cycle_test():
+	client = FakeClient({"P.a" : "SUCCESS", "P.b" : "SUCCESS", "P.c" : "SUCCESS", "P.d" : "SUCCESS"})
+	scheduler = new_scheduler(client)
+	add_all(scheduler, client, {"P.a" : ["P.c"], "P.b" : ["P.a"], "P.c" : ["P.b"], "P.d" : ["P.a"]})
+	try:
+		scheduler.run()
+	finally:
+		eq_([], client.launched)
+
+def cycle_message_test():
+	client = FakeClient({"P.a" : "SUCCESS", "P.b" : "SUCCESS", "P.c" : "SUCCESS"})
+	scheduler = new_scheduler(client)
+	add_all(scheduler, client, {"P.a" : ["P.b"], "P.b" : ["P.a"]})
+	try:
+		scheduler.run()
+		ok_(False, "No error for a cycle")
+	except ValueError as e:
+		ok_("P.a, P.b" in str(e), str(e))
+
+@raises(ValueError)
+def self_dependency_test():
+	client = FakeClient({"P.a" : "SUCCESS"})
+	scheduler = new_scheduler(client)
+	add_all(scheduler, client, {"P.a" : ["P.a"]})
+	scheduler.run()
+
+@raises(ValueError)
+def unknown_dependency_test():
+	client = FakeClient({"P.a" : "SUCCESS"})
+	scheduler = new_scheduler(client)
+	add_all(scheduler, client, {"P.a" : ["P.missing"]})
+	scheduler.run()
+
+@raises(ValueError)
+def duplicate_test():
+	client = FakeClient({"P.a" : "SUCCESS"})
+	scheduler = new_scheduler(client)
+	scheduler.add(DSSScenario(client, "P", "a"))
+	scheduler.add(DSSScenario(client, "P", "a"))
+
+@raises(DataikuException)
+def timeout_test():
+	client = FakeClient({"P.a" : "SUCCESS"}, polls=10 ** 9)
+	scheduler = DSSScenarioScheduler(client, initial_interval=0.01, max_interval=0.01)
+	add_all(scheduler, client, {})
+	scheduler.run(timeout=0.1)
@@ -0,0 +1,150 @@
+from dataikuapi.transport import RetryPolicy, send_with_retries, get_json_codec, JSON_CODECS
+from dataikuapi.utils import iter_json_array
+from requests import exceptions
+from email.utils import formatdate
+import time
+from nose.tools import ok_
+from nose.tools import eq_
+from nose.tools import raises
+
+# Tests of the retry logic, which do not need a DSS instance
+
+class FakeResponse(object):
+	def __init__(self, status_code, headers={}):
+		self.status_code = status_code
+		self.headers = headers
+		self.closed = False
+
+	def close(self):
+		self.closed = True
+
+class FakeSend(object):
+	"""
+	Returns (or raises) the given outcomes in turn, and counts the calls
+	"""
+	def __init__(self, *outcomes):
+		self.outcomes = list(outcomes)
+		self.calls = 0
+
+	def __call__(self):
+		outcome = self.outcomes[self.calls]
+		self.calls += 1
+		if isinstance(outcome, Exception):
+			raise outcome
+		return outcome
+
+def no_wait_policy(**kwargs):
+	return RetryPolicy(backoff_factor=0, **kwargs)
+
+def retry_statuses_test():
+	ok = FakeResponse(200)
+	send = FakeSend(FakeResponse(503), FakeResponse(502), FakeResponse(504), ok)
+	eq_(ok, send_with_retries(no_wait_policy(), "GET", send))
+	eq_(4, send.calls)
+	ok_(all(response.closed for response in send.outcomes[:3]))
+	ok_(not ok.closed)
+
+def other_statuses_not_retried_test():
+	for status in (200, 400, 404, 500):
+		send = FakeSend(FakeResponse(status))
+		eq_(status, send_with_retries(no_wait_policy(), "GET", send).status_code)
+		eq_(1, send.calls)
+
+def connection_errors_retried_test():
+	ok = FakeResponse(200)
+	send = FakeSend(exceptions.ConnectionError(), exceptions.Timeout(), ok)
+	eq_(ok, send_with_retries(no_wait_policy(), "PUT", send))
+	eq_(3, send.calls)
+
+def max_retries_test():
+	send = FakeSend(*[FakeResponse(503) for i in range(5)])
+	eq_(503, send_with_retries(no_wait_policy(max_retries=2), "GET", send).status_code)
+	eq_(3, send.calls)
+
+@raises(exceptions.ConnectionError)
+def max_retries_connection_error_test():
+	send = FakeSend(*[exceptions.ConnectionError() for i in range(5)])
+	send_with_retries(no_wait_policy(max_retries=2), "DELETE", send)
+
+def post_not_retried_by_default_test():
+	send = FakeSend(FakeResponse(503), FakeResponse(200))
+	eq_(503, send_with_retries(no_wait_policy(), "POST", send).status_code)
+	eq_(1, send.calls)
+
+def post_retried_when_opted_in_test():
+	send = FakeSend(FakeResponse(503), FakeResponse(200))
+	eq_(200, send_with_retries(no_wait_policy(retry_post=True), "post", send).status_code)
+	eq_(2, send.calls)
+
+def no_policy_test():
+	send = FakeSend(FakeResponse(503), FakeResponse(200))
+	eq_(503, send_with_retries(None, "GET", send).status_code)
+	eq_(1, send.calls)
+
+def not_replayable_test():
+	send = FakeSend(FakeResponse(503), FakeResponse(200))
+	eq_(503, send_with_retries(no_wait_policy(), "PUT", send, replayable=False).status_code)
+	eq_(1, send.calls)
+
+def backoff_test():
+	policy = RetryPolicy(max_retries=10, backoff_factor=0.5, max_backoff=3)
+	for attempt in range(6):
+		for i in range(20):
+			delay = policy.next_delay("GET", attempt, time.time())
+			ok_(0 <= delay <= min(3, 0.5 * 2 ** attempt), "attempt %s: %s" % (attempt, delay))
+
+def retry_after_seconds_test():
+	policy = RetryPolicy(max_backoff=30)
+	eq_(7, policy.next_delay("GET", 0, time.time(), FakeResponse(503, {"Retry-After" : "7"})))
+	# Capped by max_backoff
+	eq_(30, policy.next_delay("GET", 0, time.time(), FakeResponse(503, {"Retry-After" : "120"})))
+
+def retry_after_date_test():
+	policy = RetryPolicy(max_backoff=30)
+	delay = policy.next_delay("GET", 0, time.time(), FakeResponse(503, {"Retry-After" : formatdate(time.time() + 10, usegmt=True)}))
+	ok_(8 <= delay <= 10, delay)
+	past = policy.next_delay("GET", 0, time.time(), FakeResponse(503, {"Retry-After" : formatdate(time.time() - 10, usegmt=True)}))
+	eq_(0, past)
+
+def retry_after_invalid_test():
+	policy = RetryPolicy(backoff_factor=0.5, max_backoff=30)
+	delay = policy.next_delay("GET", 0, time.time(), FakeResponse(503, {"Retry-After" : "soon"}))
+	ok_(0 <= delay <= 0.5, delay)
+
+def total_timeout_test():
+	policy = RetryPolicy(max_backoff=30, total_timeout=10)
+	# Waiting 7s would end 12s after the start of the call
+	eq_(None, policy.next_delay("GET", 0, time.time() - 5, FakeResponse(503, {"Retry-After" : "7"})))
+	eq_(7, policy.next_delay("GET", 0, time.time() - 2, FakeResponse(503, {"Retry-After" : "7"})))
+	eq_(7, RetryPolicy(max_backoff=30, total_timeout=None).next_delay("GET", 0, time.time() - 1000, FakeResponse(503, {"Retry-After" : "7"})))
+
+def total_timeout_stops_retries_test():
+	send = FakeSend(FakeResponse(503, {"Retry-After" : "20"}), FakeResponse(200))
+	eq_(503, send_with_retries(RetryPolicy(total_timeout=10), "GET", send).status_code)
+	eq_(1, send.calls)
+
+def installed_codecs():
+	for (name, make_codec) in JSON_CODECS:
+		try:
+			yield make_codec()
+		except ImportError:
+			pass
+
+def codec_strings_are_unicode_test():
+	for codec in installed_codecs():
+		value = codec.loads('{"a" : ["b", "\\u00e9"]}')
+		eq_({u"a" : [u"b", u"\u00e9"]}, value, codec)
+		ok_(all(type(s) is unicode for s in [value.keys()[0]] + value["a"]), codec)
+
+def codec_items_strings_are_unicode_test():
+	for codec in installed_codecs():
+		items = list(iter_json_array(['["a", {"b" : "c"}]'], loads=codec.loads))
+		ok_(type(items[0]) is unicode and type(items[1].keys()[0]) is unicode and type(items[1]["b"]) is unicode, codec)
+
+def codec_utf8_test():
+	for codec in installed_codecs():
+		eq_([u"\u00e9"], codec.loads(u'["\u00e9"]'.encode("utf8")), codec)
+		eq_([u"\u00e9"], codec.loads(u'["\u00e9"]'), codec)
+
+def default_codec_test():
+	ok_(get_json_codec().name in [name for (name, make_codec) in JSON_CODECS])